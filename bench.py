@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import sqlite3
+import subprocess
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from PIL import Image, ImageDraw
+
+import main
+
+HEAVY_MODULES = ("requests", "imageio", "instagrapi", "TikTokApi",
+                 "customtkinter", "tkinter")
+STARTUP_BUDGET_MS = 250
+# La GUI necesita customtkinter/tkinter, pero nada del resto
+GUI_HEAVY_MODULES = ("requests", "imageio", "instagrapi", "TikTokApi")
+
+
+def _timeit(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return time.perf_counter() - start
+
+
+def _legacy_lookup(db_path, video_id):
+    conn = sqlite3.connect(str(db_path))
+    conn.text_factory = str
+    c = conn.cursor()
+    cutoff = (datetime.now() - timedelta(
+        hours=main.CONFIG["DUPLICATE_WINDOW_HOURS"])).isoformat()
+    c.execute("SELECT id FROM processed WHERE id = ? AND posted_at >= ?",
+              (video_id, cutoff))
+    result = c.fetchone()
+    conn.close()
+    return result
+
+
+def _legacy_insert(db_path, video_id):
+    conn = sqlite3.connect(str(db_path))
+    conn.text_factory = str
+    c = conn.cursor()
+    c.execute("""INSERT OR REPLACE INTO processed
+        (id, video_hash, source, caption, posted_at, status, error_msg)
+        VALUES (?, ?, ?, ?, ?, ?, ?)""",
+              (video_id, None, "bench", None,
+               datetime.now().isoformat(), "error", "bench"))
+    conn.commit()
+    conn.close()
+
+
+def bench_db(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        dm = main.DataManager(tmp)
+        for i in range(args.rows):
+            dm.register_error(f"seed_{i}", "bench", "seed")
+        dm.db.commit()
+
+        results = [
+            ("legacy lookup", _timeit(
+                lambda i: _legacy_lookup(dm.db_path, f"seed_{i % args.rows}"),
+                args.ops)),
+            ("pooled lookup", _timeit(
+                lambda i: dm.is_duplicate(video_id=f"seed_{i % args.rows}"),
+                args.ops)),
+            ("legacy insert", _timeit(
+                lambda i: _legacy_insert(dm.db_path, f"legacy_{i}"),
+                args.ops)),
+            ("pooled insert", _timeit(
+                lambda i: dm.register_error(f"pooled_{i}", "bench", "bench"),
+                args.ops)),
+        ]
+        dm.close()
+
+    for name, elapsed in results:
+        print(f"{name:<16} {args.ops / elapsed:>10.0f} ops/s  "
+              f"{elapsed * 1e6 / args.ops:>8.1f} µs/op")
+
+
+def _make_sample_clip(path, seconds):
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i",
+        f"testsrc2=size={main.TARGET_W}x{main.TARGET_H}:rate=30",
+        "-f", "lavfi", "-i", "sine=frequency=440",
+        "-t", str(seconds), "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest", str(path),
+    ], check=True)
+
+
+def _make_sample_logo(path, size=150):
+    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((0, 0, size - 1, size - 1), fill=(255, 255, 255, 220))
+    img.save(path)
+
+
+def _legacy_geq_encode(src, dst, logo, opacity, wx, wy):
+    graph = (
+        f"[0:v]scale={main.TARGET_W}:{main.TARGET_H}:"
+        f"force_original_aspect_ratio=decrease,"
+        f"pad={main.TARGET_W}:{main.TARGET_H}:(ow-iw)/2:(oh-ih)/2:black,"
+        f"unsharp=5:5:1.0:5:5:0.5[base];"
+        f"[1:v]format=rgba,"
+        f"geq=r='r(X,Y)*{opacity}':g='g(X,Y)*{opacity}':"
+        f"b='b(X,Y)*{opacity}':a='a(X,Y)*{opacity}'[wm];"
+        f"[base][wm]overlay={wx}:{wy}")
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error", "-i", str(src), "-i", str(logo),
+        "-filter_complex", graph,
+        "-c:v", "libx264", "-preset", "medium", "-b:v", "2500k",
+        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", str(dst),
+    ], check=True)
+
+
+def bench_watermark(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        main.CONFIG["DATA_FOLDER"] = tmp
+        src = os.path.join(tmp, "sample.mp4")
+        logo = os.path.join(tmp, "logo.png")
+        _make_sample_clip(src, args.seconds)
+        _make_sample_logo(logo)
+        frames = args.seconds * 30
+
+        runs = [
+            ("no watermark", lambda dst: main._process_video_ffmpeg(
+                src, dst, None, enhance=True)),
+            ("geq watermark", lambda dst: _legacy_geq_encode(
+                src, dst, logo, 0.7, 30, 30)),
+            ("baked watermark", lambda dst: main._process_video_ffmpeg(
+                src, dst, logo, 30, 30, 0.7, enhance=True)),
+        ]
+        for name, run in runs:
+            dst = os.path.join(tmp, f"{name.replace(' ', '_')}.mp4")
+            start = time.perf_counter()
+            run(dst)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<16} {frames / elapsed:>8.1f} fps  "
+                  f"{elapsed:>6.2f} s")
+
+
+def _import_times(module):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        fields = line.partition("import time:")[2].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        times[fields[2].strip()] = int(fields[1])
+    return times
+
+
+def bench_startup(args):
+    runs = [_import_times("main") for _ in range(args.repeat)]
+    times = min(runs, key=lambda t: t["main"])
+    total_ms = times["main"] / 1000
+    for name, us in sorted(times.items(), key=lambda kv: -kv[1])[1:args.top + 1]:
+        print(f"{name:<32} {us / 1000:>8.1f} ms")
+    print(f"{'import main':<32} {total_ms:>8.1f} ms  "
+          f"(budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    heavy = [m for m in HEAVY_MODULES if m in times]
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("FAIL: startup budget exceeded")
+        failed = True
+    return 1 if failed else 0
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("db", help="SQLite: pooled vs open/close per call")
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--ops", type=int, default=2000)
+    p.set_defaults(func=bench_db)
+
+    p = sub.add_parser("watermark",
+                       help="Encode fps with and without watermark")
+    p.add_argument("--seconds", type=int, default=10)
+    p.set_defaults(func=bench_watermark)
+
+    p = sub.add_parser("startup",
+                       help="-X importtime of main.py with a time budget")
+    p.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--top", type=int, default=10)
+    p.set_defaults(func=bench_startup)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
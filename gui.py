@@ -0,0 +1,842 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import queue
+import threading
+from pathlib import Path
+from PIL import Image, ImageTk, ImageFilter
+import customtkinter as ctk
+from tkinter import filedialog, TclError
+
+from main import (
+    CONFIG, ENCODER_PROFILES, TARGET_W, TARGET_H, PREVIEW_SCALE, GUI_W, GUI_H,
+    DataManager, BotEngine, _candidates, _calc_watermark_position,
+)
+
+
+def _decode_preview_frame(source):
+    import imageio
+    reader = imageio.get_reader(source, "ffmpeg")
+    try:
+        meta = reader.get_meta_data()
+        fps = meta.get("fps") or 30
+        duration = meta.get("duration") or 0
+        # Un solo seek a un frame representativo, lejos del fundido inicial
+        index = int(min(duration / 3, 5.0) * fps)
+        try:
+            frame = reader.get_data(index)
+        except IndexError:
+            frame = reader.get_data(0)
+    finally:
+        reader.close()
+
+    # Mismo scale+pad que el filter graph, llevado a escala de preview
+    img = Image.fromarray(frame).convert("RGB")
+    fit = min(TARGET_W / img.width, TARGET_H / img.height)
+    w, h = int(img.width * fit), int(img.height * fit)
+    x, y = (TARGET_W - w) // 2, (TARGET_H - h) // 2
+    canvas = Image.new("RGB", (GUI_W, GUI_H), "black")
+    canvas.paste(img.resize((max(1, int(w * PREVIEW_SCALE)),
+                             max(1, int(h * PREVIEW_SCALE))),
+                            Image.Resampling.BILINEAR),
+                 (int(x * PREVIEW_SCALE), int(y * PREVIEW_SCALE)))
+    return canvas
+
+
+class PreviewRenderer:
+    MAX_ITEMS = 64
+    MAX_FRAMES = 8
+
+    def __init__(self):
+        self._logo = None
+        self._logo_key = None
+        self._sizes = {}
+        self._rendered = {}
+        self._luts = {}
+        self._frames = {}
+        self._decoding = set()
+        self._frame_lock = threading.Lock()
+        # Lo marca el hilo de decodificacion; la GUI lo consulta desde Tk
+        self.frame_ready = threading.Event()
+
+    def _load(self, path):
+        key = (path, os.stat(path).st_mtime_ns)
+        if key != self._logo_key:
+            with Image.open(path) as img:
+                self._logo = img.convert("RGBA")
+            self._logo_key = key
+            self._sizes.clear()
+            self._rendered.clear()
+        return self._logo
+
+    def _resized(self, path, size):
+        logo = self._load(path)
+        if size not in self._sizes:
+            if len(self._sizes) >= self.MAX_ITEMS:
+                self._sizes.pop(next(iter(self._sizes)))
+            self._sizes[size] = logo.resize(size, Image.Resampling.LANCZOS)
+        return self._sizes[size]
+
+    def _lut(self, opacity):
+        if opacity not in self._luts:
+            self._luts[opacity] = [int(i * opacity) for i in range(256)]
+        return self._luts[opacity]
+
+    def logo(self, path, size, opacity):
+        opacity = round(opacity, 2)
+        img = self._resized(path, size)
+        key = (size, opacity)
+        if key not in self._rendered:
+            if len(self._rendered) >= self.MAX_ITEMS:
+                self._rendered.pop(next(iter(self._rendered)))
+            out = img.copy()
+            out.putalpha(img.getchannel("A").point(self._lut(opacity)))
+            self._rendered[key] = out
+        return self._rendered[key]
+
+    def frame(self, key, source, enhance):
+        with self._frame_lock:
+            if (key, enhance) in self._frames:
+                return self._frames[(key, enhance)]
+            if key in self._frames:
+                base = self._frames[key]
+            elif key in self._decoding:
+                return None
+            else:
+                self._decoding.add(key)
+                threading.Thread(target=self._decode, args=(key, source),
+                                 name="preview-frame", daemon=True).start()
+                return None
+        out = base
+        if base is not None and enhance:
+            out = base.filter(ImageFilter.UnsharpMask(
+                radius=2 * PREVIEW_SCALE, percent=100, threshold=0))
+        with self._frame_lock:
+            self._frames[(key, enhance)] = out
+        return out
+
+    def _decode(self, key, source):
+        try:
+            img = _decode_preview_frame(source)
+        except Exception:
+            img = None
+        with self._frame_lock:
+            while len(self._frames) >= self.MAX_FRAMES * 3:
+                self._frames.pop(next(iter(self._frames)))
+            self._frames[key] = img
+            self._decoding.discard(key)
+        if img is not None:
+            self.frame_ready.set()
+
+
+class ModernCard(ctk.CTkFrame):
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.configure(corner_radius=12, border_width=1, border_color="#2D3748")
+
+
+class BotGUI(ctk.CTk):
+
+    HDR_H       = 52
+    ROW_H       = 34
+    BTN_H       = 38
+    FONT_TITLE  = 15
+    FONT_LABEL  = 11
+    FONT_VALUE  = 10
+    FONT_SMALL  = 9
+    PAD_SECTION = 6
+    PAD_INNER   = 12
+
+    def __init__(self):
+        super().__init__()
+        self.title("🎬 Instagram Reels Bot Pro")
+        self.geometry("1500x920")
+        self.minsize(1280, 780)
+
+        self.logo_path = CONFIG["WATERMARK_PATH"]
+        self.logo_dims = (150, 150)
+        self.preview_img = None
+        self.frame_img = None
+        self.preview_renderer = PreviewRenderer()
+        self._preview_job = None
+
+        self.pos_x   = ctk.IntVar(value=CONFIG["WATERMARK_X"])
+        self.pos_y   = ctk.IntVar(value=CONFIG["WATERMARK_Y"])
+        self.opacity  = ctk.DoubleVar(value=CONFIG["WATERMARK_OPACITY"])
+        self.mode_var = ctk.StringVar(value=CONFIG["MODE"])
+
+        self.pos_x.trace_add("write",   lambda *_: self._update_preview())
+        self.pos_y.trace_add("write",   lambda *_: self._update_preview())
+        self.opacity.trace_add("write", lambda *_: self._update_preview())
+        self.mode_var.trace_add("write", lambda *_: self._update_preview())
+
+        self.data_mgr = DataManager(CONFIG["DATA_FOLDER"])
+        self.engine = BotEngine(self.data_mgr)
+        self._fatal = False
+        self._events = queue.Queue()
+        self.engine.bus.subscribe(
+            lambda event, data: self._events.put((event, data)))
+
+        self._setup_theme()
+        self._create_layout()
+        self._update_preview()
+        self._drain_events()
+
+    def _setup_theme(self):
+        ctk.set_appearance_mode("dark")
+        ctk.set_default_color_theme("dark-blue")
+        self.c = {
+            "bg1": "#0B0E14",  "bg2": "#14181F",  "bg3": "#1E242C",
+            "card": "#1A1F27", "card_h": "#252B35",
+            "blue": "#3B82F6", "green": "#10B981", "yellow": "#F59E0B",
+            "red": "#EF4444",  "purple": "#8B5CF6",
+            "t1": "#FFFFFF",   "t2": "#94A3B8",    "t3": "#64748B",
+            "border": "#2D3748", "border_l": "#3A4458",
+        }
+        self.configure(fg_color=self.c["bg1"])
+
+    def _create_layout(self):
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=58)
+        self.grid_columnconfigure(1, weight=42)
+
+        self._create_config_panel().grid(
+            row=0, column=0, sticky="nsew", padx=(14, 7), pady=14)
+        self._create_preview_panel().grid(
+            row=0, column=1, sticky="nsew", padx=(7, 14), pady=14)
+
+    def _create_config_panel(self):
+        panel = ModernCard(self, fg_color=self.c["bg2"])
+
+        hdr = ctk.CTkFrame(panel, fg_color=self.c["bg3"], height=self.HDR_H,
+                           corner_radius=0)
+        hdr.pack(fill="x")
+        hdr.pack_propagate(False)
+
+        hi = ctk.CTkFrame(hdr, fg_color="transparent")
+        hi.pack(expand=True, fill="both", padx=18, pady=10)
+
+        ctk.CTkLabel(hi, text="PRO",
+                     font=ctk.CTkFont(size=11, weight="bold"),
+                     text_color=self.c["purple"], fg_color=self.c["card"],
+                     corner_radius=8, padx=10, pady=3).pack(side="left", padx=12)
+
+        self.status_indicator = ctk.CTkLabel(
+            hi, text="● Listo",
+            font=ctk.CTkFont(size=11, weight="bold"),
+            text_color=self.c["green"])
+        self.status_indicator.pack(side="right", padx=12)
+
+        scroll = ctk.CTkScrollableFrame(
+            panel, fg_color="transparent",
+            scrollbar_button_color=self.c["blue"],
+            scrollbar_button_hover_color=self.c["blue"])
+        scroll.pack(fill="both", expand=True, padx=12, pady=(10, 6))
+        scroll.grid_columnconfigure(0, weight=1, uniform="cfg")
+        scroll.grid_columnconfigure(1, weight=1, uniform="cfg")
+
+        sections = [
+            ("",    "🎯", self._fill_mode,    0, 0, 1),
+            ("",  "📱", self._fill_content, 0, 1, 1),
+            ("",     "🎬", self._fill_proc,    1, 0, 1),
+            ("",       "📤", self._fill_post,    1, 1, 1),
+        ]
+        for title, icon, fn, r, c, cs in sections:
+            s = self._section(scroll, title, icon, fn)
+            s.grid(row=r, column=c, columnspan=cs, sticky="nsew",
+                   padx=self.PAD_SECTION, pady=self.PAD_SECTION)
+
+        bar = ctk.CTkFrame(panel, fg_color=self.c["bg3"], height=56,
+                           corner_radius=0)
+        bar.pack(fill="x", side="bottom")
+        bar.pack_propagate(False)
+        self._create_buttons(bar)
+
+        return panel
+
+    def _section(self, parent, title, icon, fill_fn):
+        sec = ModernCard(parent, fg_color=self.c["card"])
+
+        h = ctk.CTkFrame(sec, fg_color="transparent", height=32)
+        h.pack(fill="x", padx=self.PAD_INNER, pady=(8, 4))
+        h.pack_propagate(False)
+
+        ctk.CTkLabel(h, text=icon,
+                     font=ctk.CTkFont(size=14),
+                     text_color=self.c["blue"]).pack(side="left", padx=(0, 8))
+        ctk.CTkLabel(h, text=title,
+                     font=ctk.CTkFont(size=self.FONT_TITLE - 2, weight="bold"),
+                     text_color=self.c["t1"]).pack(side="left")
+
+        ctk.CTkFrame(sec, fg_color=self.c["border"], height=1).pack(
+            fill="x", padx=self.PAD_INNER, pady=(0, 6))
+
+        content = ctk.CTkFrame(sec, fg_color="transparent")
+        content.pack(fill="x", padx=self.PAD_INNER, pady=(0, 10))
+        fill_fn(content)
+        return sec
+
+    def _row(self, parent, label, icon=None):
+        r = ctk.CTkFrame(parent, fg_color="transparent", height=self.ROW_H)
+        r.pack(fill="x", pady=2)
+        r.pack_propagate(False)
+
+        if icon:
+            ctk.CTkLabel(r, text=icon,
+                         font=ctk.CTkFont(size=self.FONT_LABEL),
+                         text_color=self.c["blue"], width=22).pack(side="left")
+        ctk.CTkLabel(r, text=label,
+                     font=ctk.CTkFont(size=self.FONT_LABEL),
+                     text_color=self.c["t2"]).pack(side="left", padx=(4, 12))
+
+        right = ctk.CTkFrame(r, fg_color="transparent")
+        right.pack(side="right", fill="x", expand=True)
+        return right
+
+    def _fill_mode(self, p):
+        r = self._row(p, "", "⚡")
+        ctk.CTkSegmentedButton(
+            r, values=["tiktok", "local", "both"], variable=self.mode_var,
+            command=lambda v: CONFIG.update({"MODE": v}),
+            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
+        ).pack(fill="x")
+
+        for lbl, key, ico in [
+            ("Bucle",   "LOOP_ENABLED",         "🔄"),
+            ("Limpiar", "CLEANUP_AFTER_UPLOAD",  "🧹"),
+            ("Mejorar", "ENHANCE_QUALITY",       "✨"),
+        ]:
+            r = self._row(p, lbl, ico)
+            v = ctk.BooleanVar(value=CONFIG.get(key, False))
+            ctk.CTkSwitch(r, text="", variable=v, width=42,
+                          command=lambda k=key, vv=v: CONFIG.update({k: vv.get()}),
+                          progress_color=self.c["green"]).pack(side="right")
+
+    def _fill_content(self, p):
+        r = self._row(p, "Videos trending:", "📊")
+        cv = ctk.StringVar(value=str(CONFIG["TIKTOK_TRENDING_COUNT"]))
+        e = ctk.CTkEntry(r, width=60, height=28,
+                         font=ctk.CTkFont(size=self.FONT_VALUE),
+                         textvariable=cv, fg_color=self.c["bg3"])
+        e.pack(side="right")
+        e.bind("<FocusOut>", lambda _: CONFIG.update(
+            {"TIKTOK_TRENDING_COUNT": int(cv.get() or "10")}))
+
+        r = self._row(p, "Idioma:", "🌐")
+        lv = ctk.StringVar(value=CONFIG["TIKTOK_LANGUAGE"])
+        ctk.CTkOptionMenu(
+            r, values=["es", "en", "pt", "fr"], variable=lv,
+            command=lambda v: CONFIG.update({"TIKTOK_LANGUAGE": v}),
+            fg_color=self.c["bg3"], button_color=self.c["blue"],
+            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
+        ).pack(side="right")
+
+    def _fill_proc(self, p):
+        r = self._row(p, "Resolución:", "📐")
+        ctk.CTkLabel(r, text=f"{TARGET_W} × {TARGET_H}",
+                     font=ctk.CTkFont(size=self.FONT_VALUE, weight="bold"),
+                     text_color=self.c["blue"]).pack(side="right")
+
+        r = self._row(p, "Bitrate:", "⚡")
+        bv = ctk.StringVar(value=CONFIG["VIDEO_BITRATE"])
+        ctk.CTkOptionMenu(
+            r, values=["1500k", "2000k", "2500k", "3000k"], variable=bv,
+            command=lambda v: CONFIG.update({"VIDEO_BITRATE": v}),
+            fg_color=self.c["bg3"],
+            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
+        ).pack(side="right")
+
+        r = self._row(p, "Perfil:", "🎛")
+        pv = ctk.StringVar(value=CONFIG["ENCODER_PROFILE"])
+        ctk.CTkOptionMenu(
+            r, values=list(ENCODER_PROFILES), variable=pv,
+            command=lambda v: CONFIG.update({"ENCODER_PROFILE": v}),
+            fg_color=self.c["bg3"],
+            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
+        ).pack(side="right")
+
+        for lbl, key, ico in [
+            ("Ocultar likes",    "DISABLE_LIKE_COUNTS", "❤️"),
+            ("Deshab. comments", "DISABLE_COMMENTS",    "💬"),
+            ("Texto alt.",       "ENABLE_ALT_TEXT",      "♿"),
+        ]:
+            r = self._row(p, lbl, ico)
+            v = ctk.BooleanVar(value=CONFIG.get(key, False))
+            ctk.CTkSwitch(r, text="", variable=v, width=42,
+                          command=lambda k=key, vv=v: CONFIG.update({k: vv.get()}),
+                          progress_color=self.c["green"]).pack(side="right")
+
+    def _fill_post(self, p):
+        r = self._row(p, "Descripción", "📝")
+        cv = ctk.StringVar(value=CONFIG["POST_CAPTION_TEMPLATE"])
+        e = ctk.CTkEntry(r, height=28,
+                         font=ctk.CTkFont(size=self.FONT_VALUE),
+                         textvariable=cv, fg_color=self.c["bg3"])
+        e.pack(fill="x")
+        e.bind("<FocusOut>", lambda _: CONFIG.update(
+            {"POST_CAPTION_TEMPLATE": cv.get()}))
+
+        r = self._row(p, "", "#")
+        hv = ctk.StringVar(value=CONFIG["POST_HASHTAGS"])
+        e2 = ctk.CTkEntry(r, height=28,
+                          font=ctk.CTkFont(size=self.FONT_VALUE),
+                          textvariable=hv, fg_color=self.c["bg3"])
+        e2.pack(fill="x")
+        e2.bind("<FocusOut>", lambda _: CONFIG.update(
+            {"POST_HASHTAGS": hv.get()}))
+
+    def _create_buttons(self, parent):
+        bf = ctk.CTkFrame(parent, fg_color="transparent")
+        bf.pack(expand=True, fill="both", padx=16, pady=10)
+
+        self.btn_start = ctk.CTkButton(
+            bf, text="▶  INICIAR", height=self.BTN_H,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            command=self._toggle_run, fg_color=self.c["green"],
+            hover_color="#059669", corner_radius=8)
+        self.btn_start.pack(side="left", fill="x", expand=True, padx=(0, 6))
+
+        self.btn_stop = ctk.CTkButton(
+            bf, text="⏹  DETENER", height=self.BTN_H,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            command=self._stop_bot, fg_color=self.c["red"],
+            hover_color="#DC2626", corner_radius=8, state="disabled")
+        self.btn_stop.pack(side="right", fill="x", expand=True, padx=(6, 0))
+
+    def _create_preview_panel(self):
+        panel = ModernCard(self, fg_color=self.c["bg2"])
+
+        hdr = ctk.CTkFrame(panel, fg_color=self.c["bg3"], height=self.HDR_H,
+                           corner_radius=0)
+        hdr.pack(fill="x")
+        hdr.pack_propagate(False)
+
+        hi = ctk.CTkFrame(hdr, fg_color="transparent")
+        hi.pack(expand=True, fill="both", padx=16, pady=10)
+
+        ctk.CTkLabel(hi, text="📺",
+                     font=ctk.CTkFont(size=16, weight="bold"),
+                     text_color=self.c["t1"]).pack(side="left")
+        self.wm_badge = ctk.CTkLabel(
+            hi, text="● WM: ON",
+            font=ctk.CTkFont(size=9, weight="bold"),
+            text_color=self.c["green"], fg_color=self.c["card"],
+            corner_radius=8, padx=8, pady=3)
+        self.wm_badge.pack(side="right")
+
+        body = ctk.CTkFrame(panel, fg_color="transparent")
+        body.pack(fill="both", expand=True, padx=10, pady=10)
+        body.grid_columnconfigure(0, weight=3)
+        body.grid_columnconfigure(1, weight=2)
+        body.grid_rowconfigure(0, weight=1)
+
+        canvas_frame = ctk.CTkFrame(
+            body, fg_color=self.c["bg1"], corner_radius=10,
+            border_width=2, border_color=self.c["border"])
+        canvas_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 6))
+
+        canvas_center = ctk.CTkFrame(canvas_frame, fg_color="transparent")
+        canvas_center.place(relx=0.5, rely=0.5, anchor="center")
+
+        self.canvas = ctk.CTkCanvas(
+            canvas_center, width=GUI_W, height=GUI_H,
+            bg="#000000", highlightthickness=0, cursor="crosshair")
+        self.canvas.pack()
+        self._draw_guides()
+
+        ctk.CTkLabel(
+            canvas_frame, text=f"📐 {TARGET_W}×{TARGET_H}  •  {PREVIEW_SCALE:.0%}",
+            font=ctk.CTkFont(size=self.FONT_SMALL),
+            text_color=self.c["t3"]
+        ).place(relx=0.5, rely=0.97, anchor="s")
+
+        ctrl_frame = ctk.CTkFrame(body, fg_color="transparent")
+        ctrl_frame.grid(row=0, column=1, sticky="nsew", padx=(6, 0))
+        ctrl_frame.grid_rowconfigure(0, weight=1)
+        ctrl_frame.grid_columnconfigure(0, weight=1)
+
+        inner_ctrl = ctk.CTkFrame(ctrl_frame, fg_color="transparent")
+        inner_ctrl.pack(fill="both", expand=True)
+
+        self._wm_positions(inner_ctrl)
+        self._wm_sliders(inner_ctrl)
+        self._wm_toggle(inner_ctrl)
+        self._create_paths_card(inner_ctrl)
+
+        return panel
+
+    def _wm_positions(self, parent):
+        card = ctk.CTkFrame(parent, fg_color=self.c["bg3"], corner_radius=10)
+        card.pack(fill="x", pady=(0, 8))
+
+        grid = ctk.CTkFrame(card, fg_color="transparent")
+        grid.pack(padx=12, pady=(0, 12))
+        grid.grid_columnconfigure((0, 1, 2), weight=1, uniform="pos")
+
+        positions = [
+            ("↖", "TL"), ("⬆", "TC"), ("↗", "TR"),
+            ("⬅", "CL"), ("⏺", "CC"), ("➡", "CR"),
+            ("↙", "BL"), ("⬇", "BC"), ("↘", "BR"),
+        ]
+        for i, (icon, code) in enumerate(positions):
+            r, c = divmod(i, 3)
+            ctk.CTkButton(
+                grid, text=icon, width=38, height=32,
+                font=ctk.CTkFont(size=14),
+                fg_color=self.c["card"], hover_color=self.c["blue"],
+                command=lambda cd=code: self._set_preset(cd),
+            ).grid(row=r, column=c, padx=3, pady=3, sticky="ew")
+
+    def _wm_sliders(self, parent):
+        card = ctk.CTkFrame(parent, fg_color=self.c["bg3"], corner_radius=10)
+        card.pack(fill="x", pady=(0, 8))
+
+        for label, var, lo, hi_val, fmt in [
+            ("X",  self.pos_x,   0, TARGET_W, "d"),
+            ("Y",  self.pos_y,   0, TARGET_H, "d"),
+            ("Op", self.opacity, 0, 1,        ".2f"),
+        ]:
+            sf = ctk.CTkFrame(card, fg_color="transparent")
+            sf.pack(fill="x", padx=12, pady=3)
+
+            ctk.CTkLabel(sf, text=label,
+                         font=ctk.CTkFont(size=self.FONT_VALUE, weight="bold"),
+                         text_color=self.c["t2"], width=28).pack(side="left")
+            ctk.CTkSlider(
+                sf, from_=lo, to=hi_val, variable=var,
+                command=lambda _: self._update_preview(),
+                button_color=self.c["blue"],
+                button_hover_color="#60A5FA", height=16,
+            ).pack(side="left", fill="x", expand=True, padx=6)
+
+            val_lbl = ctk.CTkLabel(
+                sf, text="",
+                font=ctk.CTkFont(family="Consolas", size=self.FONT_SMALL),
+                text_color=self.c["t3"], width=42)
+            val_lbl.pack(side="right")
+            def _updater(lbl=val_lbl, v=var, f=fmt):
+                try:
+                    lbl.configure(text=format(v.get(), f))
+                except Exception:
+                    pass
+            var.trace_add("write", lambda *_, fn=_updater: fn())
+            _updater()
+
+        ctk.CTkFrame(card, fg_color="transparent", height=6).pack()
+
+    def _wm_toggle(self, parent):
+        card = ctk.CTkFrame(parent, fg_color=self.c["bg3"], corner_radius=10)
+        card.pack(fill="x", pady=(0, 8))
+
+        inner = ctk.CTkFrame(card, fg_color="transparent")
+        inner.pack(fill="x", padx=12, pady=10)
+
+        ctk.CTkLabel(inner, text="Watermark",
+                     font=ctk.CTkFont(size=self.FONT_LABEL, weight="bold"),
+                     text_color=self.c["t2"]).pack(side="left")
+
+        self.wm_switch_var = ctk.BooleanVar(value=CONFIG["WATERMARK_ENABLED"])
+        ctk.CTkSwitch(
+            inner, text="", variable=self.wm_switch_var, width=42,
+            command=self._toggle_watermark,
+            progress_color=self.c["green"]).pack(side="right")
+
+        self.logo_info = ctk.CTkLabel(
+            card, text="Sin logo cargado",
+            font=ctk.CTkFont(size=self.FONT_SMALL),
+            text_color=self.c["t3"])
+        self.logo_info.pack(padx=12, pady=(0, 10))
+
+    def _create_paths_card(self, parent):
+        card = ModernCard(parent, fg_color=self.c["bg3"])
+        card.pack(fill="x", pady=(0, 8))
+
+        title_frame = ctk.CTkFrame(card, fg_color="transparent", height=30)
+        title_frame.pack(fill="x", padx=12, pady=(8, 4))
+        ctk.CTkLabel(title_frame, text="📁",
+                     font=ctk.CTkFont(size=self.FONT_TITLE-2, weight="bold"),
+                     text_color=self.c["t1"]).pack(side="left")
+
+        grid = ctk.CTkFrame(card, fg_color="transparent")
+        grid.pack(fill="x", padx=12, pady=(0, 12))
+        grid.grid_columnconfigure(0, weight=1, uniform="path")
+        grid.grid_columnconfigure(1, weight=1, uniform="path")
+
+        all_paths = [
+            ("Descargas",  "DOWNLOAD_FOLDER",  "📥", self._sel_dl,    0, 0),
+            ("Procesados", "OUTPUT_FOLDER",     "📤", self._sel_out,   0, 1),
+            ("Vídeo local","LOCAL_VIDEO_PATH",  "🎬", self._sel_video, 1, 0),
+            ("Logo / WM",  "WATERMARK_PATH",    "🖼️", self._sel_logo,  1, 1),
+        ]
+        for label, key, icon, cb, row, col in all_paths:
+            cell = ctk.CTkFrame(grid, fg_color="transparent", height=self.ROW_H)
+            cell.grid(row=row, column=col, sticky="ew", padx=4, pady=3)
+            cell.grid_propagate(False)
+
+            ctk.CTkLabel(cell, text=icon,
+                         font=ctk.CTkFont(size=self.FONT_LABEL),
+                         text_color=self.c["blue"], width=22).pack(side="left")
+            ctk.CTkLabel(cell, text=label,
+                         font=ctk.CTkFont(size=self.FONT_VALUE),
+                         text_color=self.c["t2"], width=75).pack(side="left")
+
+            val = Path(CONFIG[key]).name if CONFIG[key] else "N/A"
+            lbl = ctk.CTkLabel(cell, text=val,
+                               font=ctk.CTkFont(size=self.FONT_SMALL),
+                               text_color=self.c["t3"])
+            lbl.pack(side="left", fill="x", expand=True, padx=4)
+
+            ctk.CTkButton(cell, text="📂", width=30, height=24, command=cb,
+                          fg_color=self.c["card"],
+                          font=ctk.CTkFont(size=self.FONT_VALUE)
+                          ).pack(side="right")
+
+            if key == "DOWNLOAD_FOLDER":
+                self.plbl_download_folder = lbl
+            elif key == "OUTPUT_FOLDER":
+                self.plbl_output_folder = lbl
+            elif key == "LOCAL_VIDEO_PATH":
+                self.plbl_local_video_path = lbl
+            elif key == "WATERMARK_PATH":
+                self.plbl_watermark_path = lbl
+
+    def _toggle_watermark(self):
+        CONFIG["WATERMARK_ENABLED"] = self.wm_switch_var.get()
+        self._update_preview()
+
+    def _draw_guides(self):
+        self.canvas.delete("guide")
+        for i in (1, 2):
+            x = GUI_W * i / 3
+            y = GUI_H * i / 3
+            self.canvas.create_line(x, 0, x, GUI_H,
+                                    fill="#2D3748", dash=(3, 5), tags="guide")
+            self.canvas.create_line(0, y, GUI_W, y,
+                                    fill="#2D3748", dash=(3, 5), tags="guide")
+        self.canvas.create_rectangle(
+            0, int(GUI_H * 0.85), GUI_W, GUI_H,
+            fill="#1A1F27", outline="#2D3748", stipple="gray50", tags="guide")
+        m = 12
+        self.canvas.create_rectangle(
+            m, m, GUI_W - m, GUI_H - m,
+            outline="#2D3748", dash=(2, 6), tags="guide")
+
+    def _set_preset(self, code):
+        wx, wy = _calc_watermark_position(
+            code, self.logo_dims[0], self.logo_dims[1])
+        self.pos_x.set(wx)
+        self.pos_y.set(wy)
+
+    def _update_preview(self, *_):
+        # Agrupa los eventos de los sliders en un redibujado por frame
+        if self._preview_job is None:
+            self._preview_job = self.after(16, self._render_preview)
+
+    def _preview_frame(self):
+        path = CONFIG["LOCAL_VIDEO_PATH"]
+        if (self.mode_var.get() in ("local", "both")
+                and path and os.path.isfile(path)):
+            key, source = (path, os.stat(path).st_mtime_ns), path
+        else:
+            candidate = _candidates.peek()
+            if not candidate or not candidate["url"]:
+                return None
+            key, source = candidate["url"], candidate["url"]
+        return self.preview_renderer.frame(
+            key, source, CONFIG["ENHANCE_QUALITY"])
+
+    def _render_preview(self):
+        self._preview_job = None
+        self.canvas.delete("preview")
+        self.canvas.delete("frame")
+
+        if hasattr(self, "wm_badge"):
+            on = CONFIG.get("WATERMARK_ENABLED", True)
+            self.wm_badge.configure(
+                text=f"● WM: {'ON' if on else 'OFF'}",
+                text_color=self.c["green"] if on else self.c["t3"])
+
+        frame = self._preview_frame()
+        if frame is not None:
+            frame = frame.convert("RGBA")
+            self.frame_img = ImageTk.PhotoImage(frame)
+            self.canvas.create_image(0, 0, image=self.frame_img,
+                                     anchor="nw", tags="frame")
+            self.canvas.tag_lower("frame")
+
+        if not CONFIG.get("WATERMARK_ENABLED", True):
+            return
+
+        wx, wy = self.pos_x.get(), self.pos_y.get()
+        vx, vy = wx * PREVIEW_SCALE, wy * PREVIEW_SCALE
+        pw = max(12, int(self.logo_dims[0] * PREVIEW_SCALE))
+        ph = max(12, int(self.logo_dims[1] * PREVIEW_SCALE))
+
+        if self.logo_path and os.path.exists(self.logo_path):
+            try:
+                img = self.preview_renderer.logo(
+                    self.logo_path, (pw, ph), self.opacity.get())
+                if frame is not None:
+                    # Overlay sobre el frame real, igual que en ffmpeg
+                    frame.alpha_composite(img, (int(vx), int(vy)))
+                    self.frame_img = ImageTk.PhotoImage(frame)
+                    self.canvas.itemconfigure("frame", image=self.frame_img)
+                else:
+                    self.preview_img = ImageTk.PhotoImage(img)
+                    self.canvas.create_image(
+                        vx, vy, image=self.preview_img,
+                        anchor="nw", tags="preview")
+                self.canvas.create_rectangle(
+                    vx, vy, vx + pw, vy + ph,
+                    outline=self.c["green"], width=1,
+                    dash=(2, 2), tags="preview")
+            except Exception:
+                self._placeholder(vx, vy, pw, ph, "Err")
+        else:
+            self._placeholder(vx, vy, max(20, pw), max(20, ph), "Logo")
+
+    def _placeholder(self, x, y, w, h, text):
+        self.canvas.create_rectangle(
+            x, y, x + w, y + h,
+            fill=self.c["yellow"], outline=self.c["t1"],
+            width=1, tags="preview")
+        self.canvas.create_text(
+            x + w / 2, y + h / 2, text=text,
+            fill=self.c["t1"], font=("Arial", 8, "bold"),
+            anchor="center", tags="preview")
+
+    def _on_logo_selected(self, filepath):
+        if filepath and os.path.exists(filepath):
+            self.logo_path = filepath
+            CONFIG["WATERMARK_PATH"] = filepath
+            try:
+                with Image.open(filepath) as img:
+                    self.logo_dims = img.size
+                self._update_preview()
+                self.logo_info.configure(
+                    text=f"✓ {Path(filepath).name}  "
+                         f"({self.logo_dims[0]}×{self.logo_dims[1]}px)")
+                self.status_indicator.configure(
+                    text="✓ Logo cargado", text_color=self.c["green"])
+            except Exception:
+                pass
+
+    def _toggle_run(self):
+        if self.engine.running:
+            self._stop_bot()
+        else:
+            self._start_bot()
+
+    def _start_bot(self):
+        CONFIG.update({
+            "WATERMARK_X": self.pos_x.get(),
+            "WATERMARK_Y": self.pos_y.get(),
+            "WATERMARK_OPACITY": self.opacity.get(),
+            "MODE": self.mode_var.get(),
+        })
+        if not self.engine.start():
+            self.status_indicator.configure(
+                text="⏳ Esperando a que termine el ciclo anterior…",
+                text_color=self.c["yellow"])
+            return
+        self.btn_start.configure(
+            state="disabled", text="● EJECUTANDO…",
+            fg_color=self.c["yellow"])
+        self.btn_stop.configure(state="normal")
+        self.status_indicator.configure(
+            text="🔄 Ejecutando…", text_color=self.c["blue"])
+
+    def _stop_bot(self):
+        self.engine.stop()
+        # INICIAR se reactiva con el evento "stopped", cuando el hilo termina
+        self.btn_start.configure(
+            state="disabled", text="⏳ DETENIENDO…",
+            fg_color=self.c["yellow"])
+        self.btn_stop.configure(state="disabled")
+        self.status_indicator.configure(
+            text="⏹ Deteniendo…", text_color=self.c["yellow"])
+
+    def _reset_buttons(self):
+        self.btn_start.configure(
+            state="normal", text="▶  INICIAR",
+            fg_color=self.c["green"])
+        self.btn_stop.configure(state="disabled")
+
+    def _drain_events(self):
+        # Los eventos del motor llegan desde otros hilos; Tk solo se toca aqui
+        try:
+            while True:
+                event, data = self._events.get_nowait()
+                self._on_engine_event(event, data)
+        except queue.Empty:
+            pass
+        except TclError:
+            return
+        if self.preview_renderer.frame_ready.is_set():
+            self.preview_renderer.frame_ready.clear()
+            self._update_preview()
+        self.after(50, self._drain_events)
+
+    def _on_engine_event(self, event, data):
+        if event == "iteration":
+            self.status_indicator.configure(
+                text=f"🔄 Iteración #{data['iteration']}",
+                text_color=self.c["blue"])
+        elif event == "progress":
+            self._on_encode_progress(data)
+        elif event == "fatal":
+            self._fatal = True
+            self.status_indicator.configure(
+                text=f"✕ {data['message']}", text_color=self.c["red"])
+        elif event == "started":
+            self._fatal = False
+        elif event == "stopped":
+            self._reset_buttons()
+            if not self._fatal:
+                self.status_indicator.configure(
+                    text="⏹ Detenido", text_color=self.c["yellow"])
+
+    def _on_encode_progress(self, progress):
+        text = (f"🎬 {progress['frame']} fr • {progress['fps']:.0f} fps • "
+                f"{progress['speed']:.2f}x")
+        if progress["eta"] is not None:
+            text += f" • ETA {int(progress['eta'])}s"
+        self.status_indicator.configure(text=text)
+
+    def _sel_dl(self):
+        f = filedialog.askdirectory()
+        if f:
+            CONFIG["DOWNLOAD_FOLDER"] = f
+            if hasattr(self, "plbl_download_folder"):
+                self.plbl_download_folder.configure(text=Path(f).name)
+
+    def _sel_out(self):
+        f = filedialog.askdirectory()
+        if f:
+            CONFIG["OUTPUT_FOLDER"] = f
+            if hasattr(self, "plbl_output_folder"):
+                self.plbl_output_folder.configure(text=Path(f).name)
+
+    def _sel_video(self):
+        f = filedialog.askopenfilename(
+            filetypes=[("Videos", "*.mp4 *.mov *.mkv *.avi")])
+        if f:
+            CONFIG["LOCAL_VIDEO_PATH"] = f
+            if hasattr(self, "plbl_local_video_path"):
+                self.plbl_local_video_path.configure(text=Path(f).name)
+            self._update_preview()
+
+    def _sel_logo(self):
+        f = filedialog.askopenfilename(filetypes=[("PNG", "*.png")])
+        if f:
+            self._on_logo_selected(f)
+            if hasattr(self, "plbl_watermark_path"):
+                self.plbl_watermark_path.configure(text=Path(f).name)
+
+    def _on_closing(self):
+        self._stop_bot()
+        self.engine.join(timeout=2)
+        self.destroy()
+        sys.exit(0)
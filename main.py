@@ -1,1089 +1,2518 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-import os
-import sys
-import time
-import json
-import threading
-import subprocess
-import hashlib
-import random
-import sqlite3
-import re
-import warnings
-import asyncio
-import urllib.request
-from datetime import datetime, timedelta
-from pathlib import Path
-from PIL import Image, ImageTk, ImageDraw, ImageFilter
-from collections import deque
-import imageio
-import requests
-import customtkinter as ctk
-from tkinter import filedialog, messagebox, TclError
-from instagrapi import Client
-from TikTokApi import TikTokApi
-
-warnings.filterwarnings("ignore", category=DeprecationWarning, module="sqlite3")
-
-CONFIG = {
-    "INSTAGRAM_USERNAME": "tu_usuario",
-    "INSTAGRAM_PASSWORD": "tu_contraseña",
-    "TIKTOK_COOKIES": {"s_v_web_id": "", "ttwid": ""},
-    "MODE": "tiktok",
-    "TIKTOK_LANGUAGE": "es",
-    "TIKTOK_TRENDING_COUNT": 10,
-    "LOCAL_VIDEO_PATH": "video.mp4",
-    "DOWNLOAD_FOLDER": "downloads",
-    "OUTPUT_FOLDER": "processed",
-    "DATA_FOLDER": "data",
-    "POST_CAPTION_TEMPLATE": "| {desc}",
-    "POST_HASHTAGS": "#reels #viral #trending",
-    "DISABLE_LIKE_COUNTS": True,
-    "DISABLE_COMMENTS": True,
-    "ENABLE_ALT_TEXT": True,
-    "ALT_TEXT": "Contenido automático",
-    "LOOP_ENABLED": False,
-    "LOOP_DELAY_SECONDS": 1800,
-    "MAX_RETRIES": 3,
-    "RETRY_BACKOFF_BASE": 2,
-    "RETRY_BACKOFF_MULTIPLIER": 1,
-    "RANDOM_JITTER_PERCENT": 10,
-    "CLEANUP_AFTER_UPLOAD": True,
-    "TARGET_WIDTH": 720,
-    "TARGET_HEIGHT": 1280,
-    "VIDEO_BITRATE": "2500k",
-    "ENHANCE_QUALITY": True,
-    "WATERMARK_ENABLED": True,
-    "WATERMARK_PATH": "",
-    "WATERMARK_X": 30,
-    "WATERMARK_Y": 30,
-    "WATERMARK_OPACITY": 0.7,
-    "DUPLICATE_WINDOW_HOURS": 72,
-    "MAX_HISTORY_ITEMS": 5000,
-}
-
-TARGET_W = CONFIG["TARGET_WIDTH"]
-TARGET_H = CONFIG["TARGET_HEIGHT"]
-
-PREVIEW_SCALE = 0.45
-GUI_W = int(TARGET_W * PREVIEW_SCALE)
-GUI_H = int(TARGET_H * PREVIEW_SCALE)
-
-
-class DataManager:
-    def __init__(self, data_folder):
-        self.data_folder = Path(data_folder)
-        self.data_folder.mkdir(parents=True, exist_ok=True)
-        self.db_path = self.data_folder / "history.db"
-        self._init_db()
-        self.processed_hashes = deque(maxlen=CONFIG["MAX_HISTORY_ITEMS"])
-        self._load_recent_hashes()
-
-    def _init_db(self):
-        conn = sqlite3.connect(str(self.db_path))
-        conn.text_factory = str
-        c = conn.cursor()
-        c.execute("""CREATE TABLE IF NOT EXISTS processed (
-            id TEXT PRIMARY KEY, video_hash TEXT, source TEXT, caption TEXT,
-            posted_at TEXT, status TEXT, error_msg TEXT)""")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_hash ON processed(video_hash)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_posted ON processed(posted_at)")
-        conn.commit()
-        conn.close()
-
-    def _load_recent_hashes(self):
-        conn = sqlite3.connect(str(self.db_path))
-        conn.text_factory = str
-        c = conn.cursor()
-        cutoff = (datetime.now() - timedelta(
-            hours=CONFIG["DUPLICATE_WINDOW_HOURS"])).isoformat()
-        c.execute(
-            'SELECT video_hash FROM processed '
-            'WHERE posted_at >= ? AND status = "success"', (cutoff,))
-        for row in c.fetchall():
-            self.processed_hashes.append(row[0])
-        conn.close()
-
-    def _calculate_hash(self, filepath):
-        h = hashlib.sha256()
-        try:
-            with open(filepath, "rb") as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    h.update(chunk)
-            return h.hexdigest()
-        except Exception:
-            return None
-
-    def is_duplicate(self, video_id=None, filepath=None):
-        if filepath:
-            file_hash = self._calculate_hash(filepath)
-            if file_hash and file_hash in self.processed_hashes:
-                return True
-        if video_id:
-            conn = sqlite3.connect(str(self.db_path))
-            conn.text_factory = str
-            c = conn.cursor()
-            cutoff = (datetime.now() - timedelta(
-                hours=CONFIG["DUPLICATE_WINDOW_HOURS"])).isoformat()
-            c.execute("SELECT id FROM processed WHERE id = ? AND posted_at >= ?",
-                      (video_id, cutoff))
-            result = c.fetchone()
-            conn.close()
-            if result:
-                return True
-        return False
-
-    def register_success(self, video_id, filepath, source, caption):
-        video_hash = self._calculate_hash(filepath) if filepath else None
-        conn = sqlite3.connect(str(self.db_path))
-        conn.text_factory = str
-        c = conn.cursor()
-        c.execute("""INSERT OR REPLACE INTO processed
-            (id, video_hash, source, caption, posted_at, status, error_msg)
-            VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (video_id, video_hash, source, caption,
-             datetime.now().isoformat(), "success", None))
-        conn.commit()
-        conn.close()
-        if video_hash:
-            self.processed_hashes.append(video_hash)
-
-    def register_error(self, video_id, source, error_msg):
-        conn = sqlite3.connect(str(self.db_path))
-        conn.text_factory = str
-        c = conn.cursor()
-        c.execute("""INSERT OR REPLACE INTO processed
-            (id, video_hash, source, caption, posted_at, status, error_msg)
-            VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (video_id, None, source, None,
-             datetime.now().isoformat(), "error", str(error_msg)[:500]))
-        conn.commit()
-        conn.close()
-
-
-def _ensure_directory(path):
-    Path(path).mkdir(parents=True, exist_ok=True)
-
-
-def _retry_operation(func, max_retries=None, *args, **kwargs):
-    max_retries = max_retries or CONFIG["MAX_RETRIES"]
-    last_exception = None
-    for attempt in range(max_retries):
-        try:
-            return func(*args, **kwargs)
-        except Exception as e:
-            last_exception = e
-            wait_time = ((CONFIG["RETRY_BACKOFF_BASE"] ** attempt)
-                         * CONFIG["RETRY_BACKOFF_MULTIPLIER"])
-            time.sleep(wait_time)
-    raise last_exception
-
-
-def _build_caption(tiktok_desc=None):
-    template = CONFIG["POST_CAPTION_TEMPLATE"]
-    base = (template.format(desc=tiktok_desc)
-            if tiktok_desc and "{desc}" in template else template)
-    return f"{base} {CONFIG['POST_HASHTAGS']}".strip()
-
-
-def _get_upload_extra_data():
-    data = {
-        "like_and_view_counts_disabled": 1 if CONFIG["DISABLE_LIKE_COUNTS"] else 0,
-        "disable_comments": 1 if CONFIG["DISABLE_COMMENTS"] else 0,
-    }
-    if CONFIG["ENABLE_ALT_TEXT"]:
-        data["custom_accessibility_caption"] = CONFIG["ALT_TEXT"]
-    return data
-
-
-def _ensure_ffmpeg():
-    try:
-        imageio.plugins.ffmpeg.get_exe()
-    except imageio.core.NeedDownloadError:
-        imageio.plugins.ffmpeg.download()
-
-
-def _instagram_login():
-    def _login():
-        cl = Client()
-        session_path = Path(CONFIG["DATA_FOLDER"]) / "ig_session.json"
-        if session_path.exists():
-            try:
-                cl.load_settings(str(session_path))
-                cl.login(CONFIG["INSTAGRAM_USERNAME"], CONFIG["INSTAGRAM_PASSWORD"])
-            except Exception:
-                cl.login(CONFIG["INSTAGRAM_USERNAME"], CONFIG["INSTAGRAM_PASSWORD"])
-        else:
-            cl.login(CONFIG["INSTAGRAM_USERNAME"], CONFIG["INSTAGRAM_PASSWORD"])
-        cl.dump_settings(str(session_path))
-        return cl
-    return _retry_operation(_login)
-
-
-def _upload_reel(client, filepath, caption):
-    def _upload():
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Not found: {filepath}")
-        media = client.clip_upload(filepath, caption,
-                                   extra_data=_get_upload_extra_data())
-        return media.dict() if hasattr(media, "dict") else {}
-    return _retry_operation(_upload)
-
-
-# ─── NUEVAS FUNCIONES USANDO TikTokApi ───────────────────────────────
-def _fetch_trending_tiktok():
-    async def _fetch():
-        async with TikTokApi() as api:
-            await api.create_sessions(ms_tokens=[], num_sessions=1, sleep_after=3)
-            videos = []
-            async for video in api.trending.videos(count=CONFIG["TIKTOK_TRENDING_COUNT"]):
-                videos.append(video)
-            return videos
-    try:
-        return asyncio.run(_fetch())
-    except Exception as e:
-        raise RuntimeError(f"Error fetching trending videos: {e}") from e
-
-
-def _download_tiktok_video(video, output_dir):
-    video_id = video.id
-    create_time = getattr(video, 'create_time', int(time.time()))
-    filename = f"{create_time}_{video_id}.mp4"
-    filepath = os.path.join(output_dir, filename)
-
-    async def _get_url():
-        return await video.video.url()
-
-    try:
-        video_url = asyncio.run(_get_url())
-        _ensure_directory(output_dir)
-        urllib.request.urlretrieve(video_url, filepath)
-        if not os.path.exists(filepath):
-            raise RuntimeError("Download failed - file not created")
-        return filepath
-    except Exception as e:
-        raise RuntimeError(f"Error downloading video: {e}") from e
-
-
-def _process_video_ffmpeg(input_path, output_path, watermark_path=None,
-                          wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k"):
-    filters = [
-        f"[0:v]scale={TARGET_W}:{TARGET_H}:"
-        f"force_original_aspect_ratio=decrease,"
-        f"pad={TARGET_W}:{TARGET_H}:(ow-iw)/2:(oh-ih)/2:black"
-    ]
-    if enhance:
-        filters[0] += ",unsharp=5:5:1.0:5:5:0.5"
-
-    has_wm = watermark_path and os.path.exists(watermark_path)
-    if has_wm:
-        filters.append(
-            f"[1:v]format=rgba,"
-            f"geq=r='r(X,Y)*{opacity}':g='g(X,Y)*{opacity}':"
-            f"b='b(X,Y)*{opacity}':a='a(X,Y)*{opacity}'[wm]")
-        filters.append(f"[0:v][wm]overlay={wx}:{wy}")
-
-    cmd = ["ffmpeg", "-y", "-v", "error", "-i", str(input_path)]
-    if has_wm:
-        cmd.extend(["-i", watermark_path])
-    cmd.extend([
-        "-filter_complex", ";".join(filters) if has_wm else filters[0],
-        "-c:v", "libx264", "-preset", "medium", "-b:v", bitrate,
-        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart",
-        str(output_path),
-    ])
-
-    si = subprocess.STARTUPINFO()
-    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    result = subprocess.run(cmd, startupinfo=si, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"FFmpeg error: {result.stderr}")
-    return output_path
-
-
-def _process_tiktok_mode(ig_client, data_mgr, watermark_path=None,
-                         wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k"):
-    trending_videos = _fetch_trending_tiktok()
-    if not trending_videos:
-        return False
-
-    # Filtrar duplicados por ID
-    available = [v for v in trending_videos if not data_mgr.is_duplicate(video_id=v.id)]
-    if not available:
-        return False
-
-    selected = random.choice(available)
-    video_id = selected.id
-    caption = _build_caption(selected.desc)
-
-    raw_path = _download_tiktok_video(selected, CONFIG["DOWNLOAD_FOLDER"])
-
-    if data_mgr.is_duplicate(filepath=raw_path):
-        if CONFIG["CLEANUP_AFTER_UPLOAD"] and os.path.exists(raw_path):
-            os.remove(raw_path)
-        return False
-
-    _ensure_directory(CONFIG["OUTPUT_FOLDER"])
-    output_path = Path(CONFIG["OUTPUT_FOLDER"]) / f"processed_{Path(raw_path).name}"
-    _process_video_ffmpeg(raw_path, output_path, watermark_path,
-                          wx, wy, opacity, enhance, bitrate)
-    _upload_reel(ig_client, str(output_path), caption)
-    data_mgr.register_success(video_id, str(output_path), "tiktok", caption)
-
-    if CONFIG["CLEANUP_AFTER_UPLOAD"]:
-        for p in [raw_path, output_path]:
-            if os.path.exists(str(p)):
-                os.remove(str(p))
-    return True
-
-
-def _process_local_mode(ig_client, data_mgr, watermark_path=None,
-                        wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k"):
-    input_path = CONFIG["LOCAL_VIDEO_PATH"]
-    if data_mgr.is_duplicate(filepath=input_path):
-        return False
-
-    caption = _build_caption()
-    _ensure_directory(CONFIG["OUTPUT_FOLDER"])
-    output_path = Path(CONFIG["OUTPUT_FOLDER"]) / f"processed_{Path(input_path).name}"
-    _process_video_ffmpeg(input_path, output_path, watermark_path,
-                          wx, wy, opacity, enhance, bitrate)
-    _upload_reel(ig_client, str(output_path), caption)
-
-    vid = hashlib.md5(
-        f"{input_path}{os.path.getmtime(input_path)}".encode()).hexdigest()
-    data_mgr.register_success(vid, str(output_path), "local", caption)
-
-    if CONFIG["CLEANUP_AFTER_UPLOAD"] and output_path.exists():
-        os.remove(output_path)
-    return True
-
-
-def _calc_watermark_position(code, logo_w, logo_h,
-                             target_w=TARGET_W, target_h=TARGET_H, pad=30):
-    x = pad if "L" in code else (target_w - logo_w - pad if "R" in code
-                                  else (target_w - logo_w) // 2)
-    y = pad if "T" in code else (target_h - logo_h - pad if "B" in code
-                                  else (target_h - logo_h) // 2)
-    return x, y
-
-
-def _check_resources():
-    try:
-        import psutil
-        if psutil.cpu_percent(interval=0.5) > 95:
-            return False
-        if psutil.virtual_memory().percent > 90:
-            return False
-        if psutil.disk_usage(CONFIG.get("OUTPUT_FOLDER", ".")).percent > 95:
-            return False
-    except ImportError:
-        pass
-    return True
-
-
-class ModernCard(ctk.CTkFrame):
-    def __init__(self, master, **kwargs):
-        super().__init__(master, **kwargs)
-        self.configure(corner_radius=12, border_width=1, border_color="#2D3748")
-
-
-class BotGUI(ctk.CTk):
-
-    HDR_H       = 52
-    ROW_H       = 34
-    BTN_H       = 38
-    FONT_TITLE  = 15
-    FONT_LABEL  = 11
-    FONT_VALUE  = 10
-    FONT_SMALL  = 9
-    PAD_SECTION = 6
-    PAD_INNER   = 12
-
-    def __init__(self):
-        super().__init__()
-        self.title("🎬 Instagram Reels Bot Pro")
-        self.geometry("1500x920")
-        self.minsize(1280, 780)
-
-        self.running = False
-        self.worker_thread = None
-        self.logo_path = CONFIG["WATERMARK_PATH"]
-        self.logo_dims = (150, 150)
-        self.preview_img = None
-
-        self.pos_x   = ctk.IntVar(value=CONFIG["WATERMARK_X"])
-        self.pos_y   = ctk.IntVar(value=CONFIG["WATERMARK_Y"])
-        self.opacity  = ctk.DoubleVar(value=CONFIG["WATERMARK_OPACITY"])
-        self.mode_var = ctk.StringVar(value=CONFIG["MODE"])
-
-        self.iteration_count = 0
-        self.success_count   = 0
-        self.error_count     = 0
-
-        self.pos_x.trace_add("write",   lambda *_: self._update_preview())
-        self.pos_y.trace_add("write",   lambda *_: self._update_preview())
-        self.opacity.trace_add("write", lambda *_: self._update_preview())
-
-        self.data_mgr = DataManager(CONFIG["DATA_FOLDER"])
-
-        self._setup_theme()
-        self._create_layout()
-        self._update_preview()
-
-    def _setup_theme(self):
-        ctk.set_appearance_mode("dark")
-        ctk.set_default_color_theme("dark-blue")
-        self.c = {
-            "bg1": "#0B0E14",  "bg2": "#14181F",  "bg3": "#1E242C",
-            "card": "#1A1F27", "card_h": "#252B35",
-            "blue": "#3B82F6", "green": "#10B981", "yellow": "#F59E0B",
-            "red": "#EF4444",  "purple": "#8B5CF6",
-            "t1": "#FFFFFF",   "t2": "#94A3B8",    "t3": "#64748B",
-            "border": "#2D3748", "border_l": "#3A4458",
-        }
-        self.configure(fg_color=self.c["bg1"])
-
-    def _create_layout(self):
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(0, weight=58)
-        self.grid_columnconfigure(1, weight=42)
-
-        self._create_config_panel().grid(
-            row=0, column=0, sticky="nsew", padx=(14, 7), pady=14)
-        self._create_preview_panel().grid(
-            row=0, column=1, sticky="nsew", padx=(7, 14), pady=14)
-
-    def _create_config_panel(self):
-        panel = ModernCard(self, fg_color=self.c["bg2"])
-
-        hdr = ctk.CTkFrame(panel, fg_color=self.c["bg3"], height=self.HDR_H,
-                           corner_radius=0)
-        hdr.pack(fill="x")
-        hdr.pack_propagate(False)
-
-        hi = ctk.CTkFrame(hdr, fg_color="transparent")
-        hi.pack(expand=True, fill="both", padx=18, pady=10)
-
-        ctk.CTkLabel(hi, text="PRO",
-                     font=ctk.CTkFont(size=11, weight="bold"),
-                     text_color=self.c["purple"], fg_color=self.c["card"],
-                     corner_radius=8, padx=10, pady=3).pack(side="left", padx=12)
-
-        self.status_indicator = ctk.CTkLabel(
-            hi, text="● Listo",
-            font=ctk.CTkFont(size=11, weight="bold"),
-            text_color=self.c["green"])
-        self.status_indicator.pack(side="right", padx=12)
-
-        scroll = ctk.CTkScrollableFrame(
-            panel, fg_color="transparent",
-            scrollbar_button_color=self.c["blue"],
-            scrollbar_button_hover_color=self.c["blue"])
-        scroll.pack(fill="both", expand=True, padx=12, pady=(10, 6))
-        scroll.grid_columnconfigure(0, weight=1, uniform="cfg")
-        scroll.grid_columnconfigure(1, weight=1, uniform="cfg")
-
-        sections = [
-            ("",    "🎯", self._fill_mode,    0, 0, 1),
-            ("",  "📱", self._fill_content, 0, 1, 1),
-            ("",     "🎬", self._fill_proc,    1, 0, 1),
-            ("",       "📤", self._fill_post,    1, 1, 1),
-        ]
-        for title, icon, fn, r, c, cs in sections:
-            s = self._section(scroll, title, icon, fn)
-            s.grid(row=r, column=c, columnspan=cs, sticky="nsew",
-                   padx=self.PAD_SECTION, pady=self.PAD_SECTION)
-
-        bar = ctk.CTkFrame(panel, fg_color=self.c["bg3"], height=56,
-                           corner_radius=0)
-        bar.pack(fill="x", side="bottom")
-        bar.pack_propagate(False)
-        self._create_buttons(bar)
-
-        return panel
-
-    def _section(self, parent, title, icon, fill_fn):
-        sec = ModernCard(parent, fg_color=self.c["card"])
-
-        h = ctk.CTkFrame(sec, fg_color="transparent", height=32)
-        h.pack(fill="x", padx=self.PAD_INNER, pady=(8, 4))
-        h.pack_propagate(False)
-
-        ctk.CTkLabel(h, text=icon,
-                     font=ctk.CTkFont(size=14),
-                     text_color=self.c["blue"]).pack(side="left", padx=(0, 8))
-        ctk.CTkLabel(h, text=title,
-                     font=ctk.CTkFont(size=self.FONT_TITLE - 2, weight="bold"),
-                     text_color=self.c["t1"]).pack(side="left")
-
-        ctk.CTkFrame(sec, fg_color=self.c["border"], height=1).pack(
-            fill="x", padx=self.PAD_INNER, pady=(0, 6))
-
-        content = ctk.CTkFrame(sec, fg_color="transparent")
-        content.pack(fill="x", padx=self.PAD_INNER, pady=(0, 10))
-        fill_fn(content)
-        return sec
-
-    def _row(self, parent, label, icon=None):
-        r = ctk.CTkFrame(parent, fg_color="transparent", height=self.ROW_H)
-        r.pack(fill="x", pady=2)
-        r.pack_propagate(False)
-
-        if icon:
-            ctk.CTkLabel(r, text=icon,
-                         font=ctk.CTkFont(size=self.FONT_LABEL),
-                         text_color=self.c["blue"], width=22).pack(side="left")
-        ctk.CTkLabel(r, text=label,
-                     font=ctk.CTkFont(size=self.FONT_LABEL),
-                     text_color=self.c["t2"]).pack(side="left", padx=(4, 12))
-
-        right = ctk.CTkFrame(r, fg_color="transparent")
-        right.pack(side="right", fill="x", expand=True)
-        return right
-
-    def _fill_mode(self, p):
-        r = self._row(p, "", "⚡")
-        ctk.CTkSegmentedButton(
-            r, values=["tiktok", "local", "both"], variable=self.mode_var,
-            command=lambda v: CONFIG.update({"MODE": v}),
-            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
-        ).pack(fill="x")
-
-        for lbl, key, ico in [
-            ("Bucle",   "LOOP_ENABLED",         "🔄"),
-            ("Limpiar", "CLEANUP_AFTER_UPLOAD",  "🧹"),
-            ("Mejorar", "ENHANCE_QUALITY",       "✨"),
-        ]:
-            r = self._row(p, lbl, ico)
-            v = ctk.BooleanVar(value=CONFIG.get(key, False))
-            ctk.CTkSwitch(r, text="", variable=v, width=42,
-                          command=lambda k=key, vv=v: CONFIG.update({k: vv.get()}),
-                          progress_color=self.c["green"]).pack(side="right")
-
-    def _fill_content(self, p):
-        r = self._row(p, "Videos trending:", "📊")
-        cv = ctk.StringVar(value=str(CONFIG["TIKTOK_TRENDING_COUNT"]))
-        e = ctk.CTkEntry(r, width=60, height=28,
-                         font=ctk.CTkFont(size=self.FONT_VALUE),
-                         textvariable=cv, fg_color=self.c["bg3"])
-        e.pack(side="right")
-        e.bind("<FocusOut>", lambda _: CONFIG.update(
-            {"TIKTOK_TRENDING_COUNT": int(cv.get() or "10")}))
-
-        r = self._row(p, "Idioma:", "🌐")
-        lv = ctk.StringVar(value=CONFIG["TIKTOK_LANGUAGE"])
-        ctk.CTkOptionMenu(
-            r, values=["es", "en", "pt", "fr"], variable=lv,
-            command=lambda v: CONFIG.update({"TIKTOK_LANGUAGE": v}),
-            fg_color=self.c["bg3"], button_color=self.c["blue"],
-            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
-        ).pack(side="right")
-
-    def _fill_proc(self, p):
-        r = self._row(p, "Resolución:", "📐")
-        ctk.CTkLabel(r, text=f"{TARGET_W} × {TARGET_H}",
-                     font=ctk.CTkFont(size=self.FONT_VALUE, weight="bold"),
-                     text_color=self.c["blue"]).pack(side="right")
-
-        r = self._row(p, "Bitrate:", "⚡")
-        bv = ctk.StringVar(value=CONFIG["VIDEO_BITRATE"])
-        ctk.CTkOptionMenu(
-            r, values=["1500k", "2000k", "2500k", "3000k"], variable=bv,
-            command=lambda v: CONFIG.update({"VIDEO_BITRATE": v}),
-            fg_color=self.c["bg3"],
-            font=ctk.CTkFont(size=self.FONT_VALUE), height=28
-        ).pack(side="right")
-
-        for lbl, key, ico in [
-            ("Ocultar likes",    "DISABLE_LIKE_COUNTS", "❤️"),
-            ("Deshab. comments", "DISABLE_COMMENTS",    "💬"),
-            ("Texto alt.",       "ENABLE_ALT_TEXT",      "♿"),
-        ]:
-            r = self._row(p, lbl, ico)
-            v = ctk.BooleanVar(value=CONFIG.get(key, False))
-            ctk.CTkSwitch(r, text="", variable=v, width=42,
-                          command=lambda k=key, vv=v: CONFIG.update({k: vv.get()}),
-                          progress_color=self.c["green"]).pack(side="right")
-
-    def _fill_post(self, p):
-        r = self._row(p, "Descripción", "📝")
-        cv = ctk.StringVar(value=CONFIG["POST_CAPTION_TEMPLATE"])
-        e = ctk.CTkEntry(r, height=28,
-                         font=ctk.CTkFont(size=self.FONT_VALUE),
-                         textvariable=cv, fg_color=self.c["bg3"])
-        e.pack(fill="x")
-        e.bind("<FocusOut>", lambda _: CONFIG.update(
-            {"POST_CAPTION_TEMPLATE": cv.get()}))
-
-        r = self._row(p, "", "#")
-        hv = ctk.StringVar(value=CONFIG["POST_HASHTAGS"])
-        e2 = ctk.CTkEntry(r, height=28,
-                          font=ctk.CTkFont(size=self.FONT_VALUE),
-                          textvariable=hv, fg_color=self.c["bg3"])
-        e2.pack(fill="x")
-        e2.bind("<FocusOut>", lambda _: CONFIG.update(
-            {"POST_HASHTAGS": hv.get()}))
-
-    def _create_buttons(self, parent):
-        bf = ctk.CTkFrame(parent, fg_color="transparent")
-        bf.pack(expand=True, fill="both", padx=16, pady=10)
-
-        self.btn_start = ctk.CTkButton(
-            bf, text="▶  INICIAR", height=self.BTN_H,
-            font=ctk.CTkFont(size=14, weight="bold"),
-            command=self._toggle_run, fg_color=self.c["green"],
-            hover_color="#059669", corner_radius=8)
-        self.btn_start.pack(side="left", fill="x", expand=True, padx=(0, 6))
-
-        self.btn_stop = ctk.CTkButton(
-            bf, text="⏹  DETENER", height=self.BTN_H,
-            font=ctk.CTkFont(size=14, weight="bold"),
-            command=self._stop_bot, fg_color=self.c["red"],
-            hover_color="#DC2626", corner_radius=8, state="disabled")
-        self.btn_stop.pack(side="right", fill="x", expand=True, padx=(6, 0))
-
-    def _create_preview_panel(self):
-        panel = ModernCard(self, fg_color=self.c["bg2"])
-
-        hdr = ctk.CTkFrame(panel, fg_color=self.c["bg3"], height=self.HDR_H,
-                           corner_radius=0)
-        hdr.pack(fill="x")
-        hdr.pack_propagate(False)
-
-        hi = ctk.CTkFrame(hdr, fg_color="transparent")
-        hi.pack(expand=True, fill="both", padx=16, pady=10)
-
-        ctk.CTkLabel(hi, text="📺",
-                     font=ctk.CTkFont(size=16, weight="bold"),
-                     text_color=self.c["t1"]).pack(side="left")
-        self.wm_badge = ctk.CTkLabel(
-            hi, text="● WM: ON",
-            font=ctk.CTkFont(size=9, weight="bold"),
-            text_color=self.c["green"], fg_color=self.c["card"],
-            corner_radius=8, padx=8, pady=3)
-        self.wm_badge.pack(side="right")
-
-        body = ctk.CTkFrame(panel, fg_color="transparent")
-        body.pack(fill="both", expand=True, padx=10, pady=10)
-        body.grid_columnconfigure(0, weight=3)
-        body.grid_columnconfigure(1, weight=2)
-        body.grid_rowconfigure(0, weight=1)
-
-        canvas_frame = ctk.CTkFrame(
-            body, fg_color=self.c["bg1"], corner_radius=10,
-            border_width=2, border_color=self.c["border"])
-        canvas_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 6))
-
-        canvas_center = ctk.CTkFrame(canvas_frame, fg_color="transparent")
-        canvas_center.place(relx=0.5, rely=0.5, anchor="center")
-
-        self.canvas = ctk.CTkCanvas(
-            canvas_center, width=GUI_W, height=GUI_H,
-            bg="#000000", highlightthickness=0, cursor="crosshair")
-        self.canvas.pack()
-        self._draw_guides()
-
-        ctk.CTkLabel(
-            canvas_frame, text=f"📐 {TARGET_W}×{TARGET_H}  •  {PREVIEW_SCALE:.0%}",
-            font=ctk.CTkFont(size=self.FONT_SMALL),
-            text_color=self.c["t3"]
-        ).place(relx=0.5, rely=0.97, anchor="s")
-
-        ctrl_frame = ctk.CTkFrame(body, fg_color="transparent")
-        ctrl_frame.grid(row=0, column=1, sticky="nsew", padx=(6, 0))
-        ctrl_frame.grid_rowconfigure(0, weight=1)
-        ctrl_frame.grid_columnconfigure(0, weight=1)
-
-        inner_ctrl = ctk.CTkFrame(ctrl_frame, fg_color="transparent")
-        inner_ctrl.pack(fill="both", expand=True)
-
-        self._wm_positions(inner_ctrl)
-        self._wm_sliders(inner_ctrl)
-        self._wm_toggle(inner_ctrl)
-        self._create_paths_card(inner_ctrl)
-
-        return panel
-
-    def _wm_positions(self, parent):
-        card = ctk.CTkFrame(parent, fg_color=self.c["bg3"], corner_radius=10)
-        card.pack(fill="x", pady=(0, 8))
-
-        grid = ctk.CTkFrame(card, fg_color="transparent")
-        grid.pack(padx=12, pady=(0, 12))
-        grid.grid_columnconfigure((0, 1, 2), weight=1, uniform="pos")
-
-        positions = [
-            ("↖", "TL"), ("⬆", "TC"), ("↗", "TR"),
-            ("⬅", "CL"), ("⏺", "CC"), ("➡", "CR"),
-            ("↙", "BL"), ("⬇", "BC"), ("↘", "BR"),
-        ]
-        for i, (icon, code) in enumerate(positions):
-            r, c = divmod(i, 3)
-            ctk.CTkButton(
-                grid, text=icon, width=38, height=32,
-                font=ctk.CTkFont(size=14),
-                fg_color=self.c["card"], hover_color=self.c["blue"],
-                command=lambda cd=code: self._set_preset(cd),
-            ).grid(row=r, column=c, padx=3, pady=3, sticky="ew")
-
-    def _wm_sliders(self, parent):
-        card = ctk.CTkFrame(parent, fg_color=self.c["bg3"], corner_radius=10)
-        card.pack(fill="x", pady=(0, 8))
-
-        for label, var, lo, hi_val, fmt in [
-            ("X",  self.pos_x,   0, TARGET_W, "d"),
-            ("Y",  self.pos_y,   0, TARGET_H, "d"),
-            ("Op", self.opacity, 0, 1,        ".2f"),
-        ]:
-            sf = ctk.CTkFrame(card, fg_color="transparent")
-            sf.pack(fill="x", padx=12, pady=3)
-
-            ctk.CTkLabel(sf, text=label,
-                         font=ctk.CTkFont(size=self.FONT_VALUE, weight="bold"),
-                         text_color=self.c["t2"], width=28).pack(side="left")
-            ctk.CTkSlider(
-                sf, from_=lo, to=hi_val, variable=var,
-                command=lambda _: self._update_preview(),
-                button_color=self.c["blue"],
-                button_hover_color="#60A5FA", height=16,
-            ).pack(side="left", fill="x", expand=True, padx=6)
-
-            val_lbl = ctk.CTkLabel(
-                sf, text="",
-                font=ctk.CTkFont(family="Consolas", size=self.FONT_SMALL),
-                text_color=self.c["t3"], width=42)
-            val_lbl.pack(side="right")
-            def _updater(lbl=val_lbl, v=var, f=fmt):
-                try:
-                    lbl.configure(text=format(v.get(), f))
-                except Exception:
-                    pass
-            var.trace_add("write", lambda *_, fn=_updater: fn())
-            _updater()
-
-        ctk.CTkFrame(card, fg_color="transparent", height=6).pack()
-
-    def _wm_toggle(self, parent):
-        card = ctk.CTkFrame(parent, fg_color=self.c["bg3"], corner_radius=10)
-        card.pack(fill="x", pady=(0, 8))
-
-        inner = ctk.CTkFrame(card, fg_color="transparent")
-        inner.pack(fill="x", padx=12, pady=10)
-
-        ctk.CTkLabel(inner, text="Watermark",
-                     font=ctk.CTkFont(size=self.FONT_LABEL, weight="bold"),
-                     text_color=self.c["t2"]).pack(side="left")
-
-        self.wm_switch_var = ctk.BooleanVar(value=CONFIG["WATERMARK_ENABLED"])
-        ctk.CTkSwitch(
-            inner, text="", variable=self.wm_switch_var, width=42,
-            command=self._toggle_watermark,
-            progress_color=self.c["green"]).pack(side="right")
-
-        self.logo_info = ctk.CTkLabel(
-            card, text="Sin logo cargado",
-            font=ctk.CTkFont(size=self.FONT_SMALL),
-            text_color=self.c["t3"])
-        self.logo_info.pack(padx=12, pady=(0, 10))
-
-    def _create_paths_card(self, parent):
-        card = ModernCard(parent, fg_color=self.c["bg3"])
-        card.pack(fill="x", pady=(0, 8))
-
-        title_frame = ctk.CTkFrame(card, fg_color="transparent", height=30)
-        title_frame.pack(fill="x", padx=12, pady=(8, 4))
-        ctk.CTkLabel(title_frame, text="📁",
-                     font=ctk.CTkFont(size=self.FONT_TITLE-2, weight="bold"),
-                     text_color=self.c["t1"]).pack(side="left")
-
-        grid = ctk.CTkFrame(card, fg_color="transparent")
-        grid.pack(fill="x", padx=12, pady=(0, 12))
-        grid.grid_columnconfigure(0, weight=1, uniform="path")
-        grid.grid_columnconfigure(1, weight=1, uniform="path")
-
-        all_paths = [
-            ("Descargas",  "DOWNLOAD_FOLDER",  "📥", self._sel_dl,    0, 0),
-            ("Procesados", "OUTPUT_FOLDER",     "📤", self._sel_out,   0, 1),
-            ("Vídeo local","LOCAL_VIDEO_PATH",  "🎬", self._sel_video, 1, 0),
-            ("Logo / WM",  "WATERMARK_PATH",    "🖼️", self._sel_logo,  1, 1),
-        ]
-        for label, key, icon, cb, row, col in all_paths:
-            cell = ctk.CTkFrame(grid, fg_color="transparent", height=self.ROW_H)
-            cell.grid(row=row, column=col, sticky="ew", padx=4, pady=3)
-            cell.grid_propagate(False)
-
-            ctk.CTkLabel(cell, text=icon,
-                         font=ctk.CTkFont(size=self.FONT_LABEL),
-                         text_color=self.c["blue"], width=22).pack(side="left")
-            ctk.CTkLabel(cell, text=label,
-                         font=ctk.CTkFont(size=self.FONT_VALUE),
-                         text_color=self.c["t2"], width=75).pack(side="left")
-
-            val = Path(CONFIG[key]).name if CONFIG[key] else "N/A"
-            lbl = ctk.CTkLabel(cell, text=val,
-                               font=ctk.CTkFont(size=self.FONT_SMALL),
-                               text_color=self.c["t3"])
-            lbl.pack(side="left", fill="x", expand=True, padx=4)
-
-            ctk.CTkButton(cell, text="📂", width=30, height=24, command=cb,
-                          fg_color=self.c["card"],
-                          font=ctk.CTkFont(size=self.FONT_VALUE)
-                          ).pack(side="right")
-
-            if key == "DOWNLOAD_FOLDER":
-                self.plbl_download_folder = lbl
-            elif key == "OUTPUT_FOLDER":
-                self.plbl_output_folder = lbl
-            elif key == "LOCAL_VIDEO_PATH":
-                self.plbl_local_video_path = lbl
-            elif key == "WATERMARK_PATH":
-                self.plbl_watermark_path = lbl
-
-    def _toggle_watermark(self):
-        CONFIG["WATERMARK_ENABLED"] = self.wm_switch_var.get()
-        self._update_preview()
-
-    def _draw_guides(self):
-        self.canvas.delete("guide")
-        for i in (1, 2):
-            x = GUI_W * i / 3
-            y = GUI_H * i / 3
-            self.canvas.create_line(x, 0, x, GUI_H,
-                                    fill="#2D3748", dash=(3, 5), tags="guide")
-            self.canvas.create_line(0, y, GUI_W, y,
-                                    fill="#2D3748", dash=(3, 5), tags="guide")
-        self.canvas.create_rectangle(
-            0, int(GUI_H * 0.85), GUI_W, GUI_H,
-            fill="#1A1F27", outline="#2D3748", stipple="gray50", tags="guide")
-        m = 12
-        self.canvas.create_rectangle(
-            m, m, GUI_W - m, GUI_H - m,
-            outline="#2D3748", dash=(2, 6), tags="guide")
-
-    def _set_preset(self, code):
-        wx, wy = _calc_watermark_position(
-            code, self.logo_dims[0], self.logo_dims[1])
-        self.pos_x.set(wx)
-        self.pos_y.set(wy)
-
-    def _update_preview(self, *_):
-        self.canvas.delete("preview")
-
-        if hasattr(self, "wm_badge"):
-            on = CONFIG.get("WATERMARK_ENABLED", True)
-            self.wm_badge.configure(
-                text=f"● WM: {'ON' if on else 'OFF'}",
-                text_color=self.c["green"] if on else self.c["t3"])
-
-        if not CONFIG.get("WATERMARK_ENABLED", True):
-            return
-
-        wx, wy = self.pos_x.get(), self.pos_y.get()
-        vx, vy = wx * PREVIEW_SCALE, wy * PREVIEW_SCALE
-        pw = max(12, int(self.logo_dims[0] * PREVIEW_SCALE))
-        ph = max(12, int(self.logo_dims[1] * PREVIEW_SCALE))
-
-        if self.logo_path and os.path.exists(self.logo_path):
-            try:
-                img = Image.open(self.logo_path).convert("RGBA")
-                img = img.resize((pw, ph), Image.Resampling.LANCZOS)
-                alpha = img.split()[3].point(
-                    lambda p: int(p * self.opacity.get()))
-                img.putalpha(alpha)
-                self.preview_img = ImageTk.PhotoImage(img)
-                self.canvas.create_image(
-                    vx, vy, image=self.preview_img,
-                    anchor="nw", tags="preview")
-                self.canvas.create_rectangle(
-                    vx, vy, vx + pw, vy + ph,
-                    outline=self.c["green"], width=1,
-                    dash=(2, 2), tags="preview")
-            except Exception:
-                self._placeholder(vx, vy, pw, ph, "Err")
-        else:
-            self._placeholder(vx, vy, max(20, pw), max(20, ph), "Logo")
-
-    def _placeholder(self, x, y, w, h, text):
-        self.canvas.create_rectangle(
-            x, y, x + w, y + h,
-            fill=self.c["yellow"], outline=self.c["t1"],
-            width=1, tags="preview")
-        self.canvas.create_text(
-            x + w / 2, y + h / 2, text=text,
-            fill=self.c["t1"], font=("Arial", 8, "bold"),
-            anchor="center", tags="preview")
-
-    def _on_logo_selected(self, filepath):
-        if filepath and os.path.exists(filepath):
-            self.logo_path = filepath
-            CONFIG["WATERMARK_PATH"] = filepath
-            try:
-                with Image.open(filepath) as img:
-                    self.logo_dims = img.size
-                self._update_preview()
-                self.logo_info.configure(
-                    text=f"✓ {Path(filepath).name}  "
-                         f"({self.logo_dims[0]}×{self.logo_dims[1]}px)")
-                self.status_indicator.configure(
-                    text="✓ Logo cargado", text_color=self.c["green"])
-            except Exception:
-                pass
-
-    def _toggle_run(self):
-        if self.running:
-            self._stop_bot()
-        else:
-            self._start_bot()
-
-    def _start_bot(self):
-        CONFIG.update({
-            "WATERMARK_X": self.pos_x.get(),
-            "WATERMARK_Y": self.pos_y.get(),
-            "WATERMARK_OPACITY": self.opacity.get(),
-            "MODE": self.mode_var.get(),
-        })
-        self.running = True
-        self.btn_start.configure(
-            state="disabled", text="● EJECUTANDO…",
-            fg_color=self.c["yellow"])
-        self.btn_stop.configure(state="normal")
-        self.status_indicator.configure(
-            text="🔄 Ejecutando…", text_color=self.c["blue"])
-        self.worker_thread = threading.Thread(
-            target=self._bot_worker, daemon=True)
-        self.worker_thread.start()
-
-    def _stop_bot(self):
-        self.running = False
-        CONFIG["LOOP_ENABLED"] = False
-        self.btn_start.configure(
-            state="normal", text="▶  INICIAR",
-            fg_color=self.c["green"])
-        self.btn_stop.configure(state="disabled")
-        self.status_indicator.configure(
-            text="⏹ Detenido", text_color=self.c["yellow"])
-
-    def _bot_worker(self):
-        try:
-            _ensure_ffmpeg()
-            _ensure_directory(CONFIG["DOWNLOAD_FOLDER"])
-            _ensure_directory(CONFIG["OUTPUT_FOLDER"])
-            ig_client = _instagram_login()
-            iteration = 0
-
-            while self.running:
-                iteration += 1
-                try:
-                    self.status_indicator.configure(
-                        text=f"🔄 Iteración #{iteration}")
-                except TclError:
-                    pass
-
-                if not _check_resources():
-                    time.sleep(300)
-                    continue
-
-                try:
-                    mode = CONFIG["MODE"]
-                    wm = (CONFIG["WATERMARK_PATH"]
-                          if CONFIG["WATERMARK_ENABLED"] else None)
-                    kw = dict(
-                        watermark_path=wm,
-                        wx=CONFIG["WATERMARK_X"],
-                        wy=CONFIG["WATERMARK_Y"],
-                        opacity=CONFIG["WATERMARK_OPACITY"],
-                        enhance=CONFIG["ENHANCE_QUALITY"],
-                        bitrate=CONFIG["VIDEO_BITRATE"])
-
-                    if mode in ("tiktok", "both"):
-                        if _process_tiktok_mode(ig_client, self.data_mgr, **kw):
-                            self.success_count += 1
-                    if mode in ("local", "both"):
-                        if _process_local_mode(ig_client, self.data_mgr, **kw):
-                            self.success_count += 1
-
-                except Exception as e:
-                    self.error_count += 1
-                    self.data_mgr.register_error(
-                        f"iter_{iteration}", "bot", str(e))
-                    time.sleep(60)
-                    continue
-
-                if not CONFIG["LOOP_ENABLED"]:
-                    break
-
-                base = CONFIG["LOOP_DELAY_SECONDS"]
-                jitter = int(base * CONFIG["RANDOM_JITTER_PERCENT"] / 100)
-                delay = random.randint(base - jitter, base + jitter)
-                for _ in range(delay // 2):
-                    if not self.running:
-                        break
-                    time.sleep(2)
-
-        except Exception:
-            pass
-        finally:
-            self.running = False
-            try:
-                self.btn_start.configure(
-                    state="normal", text="▶  INICIAR",
-                    fg_color=self.c["green"])
-                self.btn_stop.configure(state="disabled")
-            except TclError:
-                pass
-
-    def _sel_dl(self):
-        f = filedialog.askdirectory()
-        if f:
-            CONFIG["DOWNLOAD_FOLDER"] = f
-            if hasattr(self, "plbl_download_folder"):
-                self.plbl_download_folder.configure(text=Path(f).name)
-
-    def _sel_out(self):
-        f = filedialog.askdirectory()
-        if f:
-            CONFIG["OUTPUT_FOLDER"] = f
-            if hasattr(self, "plbl_output_folder"):
-                self.plbl_output_folder.configure(text=Path(f).name)
-
-    def _sel_video(self):
-        f = filedialog.askopenfilename(
-            filetypes=[("Videos", "*.mp4 *.mov *.mkv *.avi")])
-        if f:
-            CONFIG["LOCAL_VIDEO_PATH"] = f
-            if hasattr(self, "plbl_local_video_path"):
-                self.plbl_local_video_path.configure(text=Path(f).name)
-
-    def _sel_logo(self):
-        f = filedialog.askopenfilename(filetypes=[("PNG", "*.png")])
-        if f:
-            self._on_logo_selected(f)
-            if hasattr(self, "plbl_watermark_path"):
-                self.plbl_watermark_path.configure(text=Path(f).name)
-
-    def _on_closing(self):
-        self._stop_bot()
-        if self.worker_thread and self.worker_thread.is_alive():
-            self.worker_thread.join(timeout=2)
-        self.destroy()
-        sys.exit(0)
-
-
-def main():
-    try:
-        for folder in [CONFIG["DATA_FOLDER"], CONFIG["DOWNLOAD_FOLDER"],
-                       CONFIG["OUTPUT_FOLDER"]]:
-            Path(folder).mkdir(parents=True, exist_ok=True)
-        app = BotGUI()
-        app.protocol("WM_DELETE_WINDOW", app._on_closing)
-        app.mainloop()
-    except Exception as e:
-        messagebox.showerror("Error", f"Error al iniciar:\n{str(e)}")
-        sys.exit(1)
-
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import atexit
+import time
+import json
+import threading
+import queue
+import subprocess
+import tempfile
+import shutil
+import itertools
+import uuid
+import hashlib
+import random
+import sqlite3
+import re
+import argparse
+import signal
+from collections import deque
+import warnings
+import asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from PIL import Image
+
+warnings.filterwarnings("ignore", category=DeprecationWarning, module="sqlite3")
+
+CONFIG = {
+    "INSTAGRAM_USERNAME": "tu_usuario",
+    "INSTAGRAM_PASSWORD": "tu_contraseña",
+    "INSTAGRAM_SESSION_MAX_AGE_HOURS": 24 * 7,
+    "TIKTOK_COOKIES": {"s_v_web_id": "", "ttwid": ""},
+    "MODE": "tiktok",
+    "TIKTOK_LANGUAGE": "es",
+    "TIKTOK_TRENDING_COUNT": 10,
+    "TIKTOK_NUM_SESSIONS": 1,
+    "TIKTOK_WARMUP_SECONDS": 3,
+    "TIKTOK_CALL_TIMEOUT": 120,
+    "LOCAL_VIDEO_PATH": "video.mp4",
+    "DOWNLOAD_FOLDER": "downloads",
+    "OUTPUT_FOLDER": "processed",
+    "DATA_FOLDER": "data",
+    "POST_CAPTION_TEMPLATE": "| {desc}",
+    "POST_HASHTAGS": "#reels #viral #trending",
+    "DISABLE_LIKE_COUNTS": True,
+    "DISABLE_COMMENTS": True,
+    "ENABLE_ALT_TEXT": True,
+    "ALT_TEXT": "Contenido automático",
+    "LOOP_ENABLED": False,
+    "LOOP_DELAY_SECONDS": 1800,
+    "MAX_RETRIES": 3,
+    "RETRY_BACKOFF_BASE": 2,
+    "RETRY_BACKOFF_MULTIPLIER": 1,
+    "RANDOM_JITTER_PERCENT": 10,
+    "RETRY_FULL_JITTER": True,
+    "RETRY_MAX_DELAY_SECONDS": 30,
+    "RETRY_BUDGET_SECONDS": 120,
+    "CLEANUP_AFTER_UPLOAD": True,
+    "TARGET_WIDTH": 720,
+    "TARGET_HEIGHT": 1280,
+    "VIDEO_BITRATE": "2500k",
+    "ENCODER_PROFILE": "balanced",
+    "CALIBRATION_SECONDS": 10,
+    "CALIBRATION_TARGET_SSIM": 0.97,
+    "ENCODE_WORKERS": 0,
+    "RENDER_CACHE_ENABLED": True,
+    "RENDER_CACHE_MAX_MB": 2048,
+    "WORK_MAX_ATTEMPTS": 5,
+    "GOVERNOR_SAMPLE_SECONDS": 1.0,
+    "GOVERNOR_WINDOW": 5,
+    "GOVERNOR_MAX_CPU_PERCENT": 90,
+    "GOVERNOR_IDLE_CPU_PERCENT": 10,
+    "GOVERNOR_MAX_MEM_PERCENT": 90,
+    "GOVERNOR_MIN_DISK_FREE_MB": 1024,
+    "GOVERNOR_ENCODE_MEM_MB": 400,
+    "GOVERNOR_DOWNLOAD_MEM_MB": 64,
+    "GOVERNOR_DOWNLOAD_DISK_MB": 100,
+    "ENHANCE_QUALITY": True,
+    "WATERMARK_ENABLED": True,
+    "WATERMARK_PATH": "",
+    "WATERMARK_X": 30,
+    "WATERMARK_Y": 30,
+    "WATERMARK_OPACITY": 0.7,
+    "DUPLICATE_WINDOW_HOURS": 72,
+    "MAX_HISTORY_ITEMS": 5000,
+    "DB_COMMIT_BATCH_SIZE": 20,
+    "DB_COMMIT_INTERVAL_SECONDS": 5,
+    "FINGERPRINT_MODE": "sampled",
+    "FINGERPRINT_SAMPLE_BYTES": 256 * 1024,
+    "FINGERPRINT_BUFFER_BYTES": 1024 * 1024,
+    "PERCEPTUAL_DEDUP": True,
+    "PERCEPTUAL_FRAMES": 4,
+    "PERCEPTUAL_MAX_DISTANCE": 24,
+    # Con lote 1 las etapas corren una detras de otra; con 3 items la
+    # descarga y el encode del siguiente se solapan con la subida del
+    # anterior. Ojo: cada vuelta publica hasta PIPELINE_BATCH_SIZE reels
+    # seguidos, asi que el ritmo medio es lote / LOOP_DELAY_SECONDS; para
+    # mantener el de antes hay que multiplicar LOOP_DELAY_SECONDS por el lote
+    "PIPELINE_BATCH_SIZE": 3,
+    "PIPELINE_QUEUE_SIZE": 2,
+    "PIPELINE_DOWNLOAD_WORKERS": 2,
+    "PIPELINE_ENCODE_WORKERS": 2,
+    "PIPELINE_UPLOAD_WORKERS": 1,
+    "DOWNLOAD_POOL_SIZE": 8,
+    "DOWNLOAD_CHUNK_BYTES": 1024 * 1024,
+    "DOWNLOAD_MAX_BYTES": 500 * 1024 * 1024,
+    "DOWNLOAD_TIMEOUT_SECONDS": 300,
+    "DOWNLOAD_CONNECT_TIMEOUT": 10,
+    "DOWNLOAD_READ_TIMEOUT": 30,
+    "DOWNLOAD_MAX_ATTEMPTS": 3,
+    "DOWNLOAD_EARLY_ABORT": True,
+    "STREAMING_MODE": False,
+    "STREAMING_TMP_DIR": "",
+    "STREAMING_SNIFF_BYTES": 1024 * 1024,
+    "CANDIDATE_TTL_SECONDS": 6 * 3600,
+    "CANDIDATE_URL_TTL_SECONDS": 600,
+    "CANDIDATE_LOW_WATERMARK": 3,
+    "CANDIDATE_MAX_ITEMS": 50,
+}
+
+TARGET_W = CONFIG["TARGET_WIDTH"]
+TARGET_H = CONFIG["TARGET_HEIGHT"]
+
+ENCODER_PROFILES = {
+    "fast": {"preset": "veryfast", "crf": 23, "tune": None,
+             "threads": 0, "x264_params": "ref=2:bframes=2:subme=4"},
+    "balanced": {"preset": "faster", "crf": 21, "tune": None,
+                 "threads": 0, "x264_params": "ref=3:bframes=3"},
+    "quality": {"preset": "medium", "crf": None, "tune": None,
+                "threads": 0, "x264_params": None},
+}
+
+# Menor valor = antes en la cola de EncodeScheduler
+ENCODE_PRIORITIES = {
+    "resumed": 0,    # ya descargado en una iteracion anterior
+    "stream": 5,     # ffmpeg lee de una conexion HTTP abierta
+    "tiktok": 10,
+    "local": 20,
+}
+
+PREVIEW_SCALE = 0.45
+GUI_W = int(TARGET_W * PREVIEW_SCALE)
+GUI_H = int(TARGET_H * PREVIEW_SCALE)
+
+
+class ConnectionManager:
+    def __init__(self, db_path, batch_size=None, commit_interval=None):
+        self.db_path = str(db_path)
+        self.batch_size = batch_size or CONFIG["DB_COMMIT_BATCH_SIZE"]
+        self.commit_interval = (commit_interval if commit_interval is not None
+                                else CONFIG["DB_COMMIT_INTERVAL_SECONDS"])
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._connections = []
+        self._writer = None
+        self._pending = 0
+        self._flush_timer = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30,
+                               check_same_thread=False,
+                               cached_statements=256)
+        conn.text_factory = str
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @property
+    def writer(self):
+        # Una sola conexion de escritura: el lote abierto nunca bloquea a
+        # otro hilo que escribe, y el temporizador lo cierra a tiempo
+        with self._lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            return self._writer
+
+    def query(self, sql, params=()):
+        if self._pending:
+            self.commit()
+        return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        if self._pending:
+            self.commit()
+        return self.conn.execute(sql, params).fetchone()
+
+    def execute(self, sql, params=(), durable=False):
+        with self._lock:
+            self.writer.execute(sql, params)
+            self._after_write(durable)
+
+    def executemany(self, sql, seq, durable=False):
+        with self._lock:
+            self.writer.executemany(sql, seq)
+            self._after_write(durable)
+
+    def executescript(self, script):
+        with self._lock:
+            self.writer.executescript(script)
+            self._pending = 0
+
+    def _after_write(self, durable):
+        self._pending += 1
+        if durable or self._pending >= self.batch_size:
+            self.commit()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.commit_interval,
+                                                self.commit)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def commit(self):
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._pending:
+                self._writer.commit()
+                self._pending = 0
+
+    def release(self):
+        # Cierra la conexion de lectura del hilo actual al terminar
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self):
+        self.commit()
+        with self._lock:
+            conns, self._connections = self._connections, []
+            self._writer = None
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+
+class DedupIndex:
+    def __init__(self, maxlen, window_hours):
+        self.maxlen = maxlen
+        self.window = window_hours * 3600
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def add(self, key, ts=None):
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = ts
+            self._evict()
+
+    def _evict(self):
+        items = self._items
+        while len(items) > self.maxlen:
+            del items[next(iter(items))]
+        cutoff = time.time() - self.window
+        while items:
+            key = next(iter(items))
+            if items[key] >= cutoff:
+                break
+            del items[key]
+
+    def __contains__(self, key):
+        ts = self._items.get(key)
+        if ts is None:
+            return False
+        if ts < time.time() - self.window:
+            with self._lock:
+                self._items.pop(key, None)
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _full_digest(filepath):
+    h = hashlib.sha256()
+    buf = bytearray(CONFIG["FINGERPRINT_BUFFER_BYTES"])
+    view = memoryview(buf)
+    with open(filepath, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def _sampled_digest(filepath, size):
+    sample = CONFIG["FINGERPRINT_SAMPLE_BYTES"]
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, "little"))
+    with open(filepath, "rb") as f:
+        if size <= sample * 3:
+            h.update(f.read())
+        else:
+            for offset in (0, (size - sample) // 2, size - sample):
+                f.seek(offset)
+                h.update(f.read(sample))
+    return h.hexdigest()
+
+
+def _dhash(frame, size=8):
+    img = Image.fromarray(frame).convert("L").resize(
+        (size + 1, size), Image.Resampling.LANCZOS)
+    px = list(img.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            i = row * (size + 1) + col
+            bits = (bits << 1) | (px[i] > px[i + 1])
+    return bits
+
+
+def _perceptual_digest(filepath):
+    import imageio
+    count = CONFIG["PERCEPTUAL_FRAMES"]
+    reader = imageio.get_reader(str(filepath), "ffmpeg")
+    try:
+        meta = reader.get_meta_data()
+        total = int(meta.get("duration", 0) * meta.get("fps", 0))
+        if total < count:
+            return None
+        hashes = [_dhash(reader.get_data(total * (i + 1) // (count + 1)))
+                  for i in range(count)]
+    finally:
+        reader.close()
+    return "".join(f"{h:016x}" for h in hashes)
+
+
+def _split_signature(signature):
+    return tuple(int(signature[i:i + 16], 16)
+                 for i in range(0, len(signature), 16))
+
+
+def _signature_distance(a, b):
+    return sum(bin(x ^ y).count("1") for x, y in zip(a, b))
+
+
+class BKTree:
+    def __init__(self, distance):
+        self.distance = distance
+        self.root = None
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def add(self, item, value):
+        with self._lock:
+            self.size += 1
+            if self.root is None:
+                self.root = (item, value, {})
+                return
+            node = self.root
+            while True:
+                d = self.distance(item, node[0])
+                child = node[2].get(d)
+                if child is None:
+                    node[2][d] = (item, value, {})
+                    return
+                node = child
+
+    def search(self, item, radius):
+        found = []
+        with self._lock:
+            stack = [self.root] if self.root else []
+            while stack:
+                node = stack.pop()
+                d = self.distance(item, node[0])
+                if d <= radius:
+                    found.append((d, node[1]))
+                for edge, child in node[2].items():
+                    if d - radius <= edge <= d + radius:
+                        stack.append(child)
+        return found
+
+
+class DataManager:
+    MEMO_SIZE = 256
+
+    def __init__(self, data_folder):
+        self.data_folder = Path(data_folder)
+        self.data_folder.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.data_folder / "history.db"
+        self.db = ConnectionManager(self.db_path)
+        atexit.register(self.close)
+        self._init_db()
+        self.processed_hashes = DedupIndex(CONFIG["MAX_HISTORY_ITEMS"],
+                                           CONFIG["DUPLICATE_WINDOW_HOURS"])
+        self.processed_ids = DedupIndex(CONFIG["MAX_HISTORY_ITEMS"],
+                                        CONFIG["DUPLICATE_WINDOW_HOURS"])
+        self.processed_samples = DedupIndex(CONFIG["MAX_HISTORY_ITEMS"],
+                                            CONFIG["DUPLICATE_WINDOW_HOURS"])
+        self.processed_prefixes = DedupIndex(CONFIG["MAX_HISTORY_ITEMS"],
+                                             CONFIG["DUPLICATE_WINDOW_HOURS"])
+        self.perceptual_index = BKTree(_signature_distance)
+        self._fingerprints = {}
+        self._probes = {}
+        self._legacy_until = 0.0
+        self._load_recent_hashes()
+        self._load_recent_signatures()
+        self._load_recent_ids()
+
+    def close(self):
+        self.db.close()
+
+    def _cutoff(self):
+        return (datetime.now() - timedelta(
+            hours=CONFIG["DUPLICATE_WINDOW_HOURS"])).isoformat()
+
+    def _init_db(self):
+        self.db.executescript("""CREATE TABLE IF NOT EXISTS processed (
+            id TEXT PRIMARY KEY, video_hash TEXT, source TEXT, caption TEXT,
+            posted_at TEXT, status TEXT, error_msg TEXT);
+            CREATE INDEX IF NOT EXISTS idx_hash ON processed(video_hash);
+            CREATE INDEX IF NOT EXISTS idx_posted ON processed(posted_at);
+            CREATE TABLE IF NOT EXISTS encode_metrics (
+            video_id TEXT, encoded_at TEXT, mode TEXT, wall_seconds REAL,
+            speed REAL, bitrate_kbps REAL, frames INTEGER, fps REAL);
+            CREATE INDEX IF NOT EXISTS idx_metrics_video
+            ON encode_metrics(video_id);
+            CREATE TABLE IF NOT EXISTS work_items (
+            id TEXT PRIMARY KEY, source TEXT, stage TEXT, caption TEXT,
+            raw_path TEXT, output_path TEXT, payload TEXT,
+            attempts INTEGER DEFAULT 0, last_error TEXT, updated_at TEXT);
+            CREATE INDEX IF NOT EXISTS idx_work_stage ON work_items(stage);""")
+        self._add_columns("processed", {"sample_hash": "TEXT",
+                                        "prefix_hash": "TEXT",
+                                        "phash": "TEXT"})
+        self.db.executescript(
+            "CREATE INDEX IF NOT EXISTS idx_sample ON processed(sample_hash);")
+
+    def _add_columns(self, table, columns):
+        existing = {row[1] for row in self.db.query(
+            f"PRAGMA table_info({table})")}
+        for name, col_type in columns.items():
+            if name not in existing:
+                self.db.executescript(
+                    f"ALTER TABLE {table} ADD COLUMN {name} {col_type};")
+
+    def _load_recent_hashes(self):
+        rows = self.db.query(
+            "SELECT video_hash, sample_hash, prefix_hash, posted_at "
+            "FROM processed WHERE posted_at >= ? AND status = 'success' "
+            "AND video_hash IS NOT NULL ORDER BY posted_at", (self._cutoff(),))
+        window = CONFIG["DUPLICATE_WINDOW_HOURS"] * 3600
+        for video_hash, sample_hash, prefix_hash, posted_at in rows:
+            ts = datetime.fromisoformat(posted_at).timestamp()
+            self.processed_hashes.add(bytes.fromhex(video_hash), ts)
+            if prefix_hash:
+                self.processed_prefixes.add(bytes.fromhex(prefix_hash), ts)
+            if sample_hash:
+                self.processed_samples.add(bytes.fromhex(sample_hash), ts)
+            else:
+                self._legacy_until = max(self._legacy_until, ts + window)
+
+    def _load_recent_signatures(self):
+        rows = self.db.query(
+            "SELECT id, phash, posted_at FROM processed "
+            "WHERE posted_at >= ? AND status = 'success' "
+            "AND phash IS NOT NULL", (self._cutoff(),))
+        self.perceptual_index = BKTree(_signature_distance)
+        width = CONFIG["PERCEPTUAL_FRAMES"] * 16
+        for video_id, phash, posted_at in rows:
+            if len(phash) == width:
+                self.perceptual_index.add(
+                    _split_signature(phash),
+                    (video_id, datetime.fromisoformat(posted_at).timestamp()))
+
+    def _add_signature(self, video_id, signature):
+        index = self.perceptual_index
+        if index.size >= CONFIG["MAX_HISTORY_ITEMS"] * 2:
+            self._load_recent_signatures()
+            index = self.perceptual_index
+        index.add(_split_signature(signature), (video_id, time.time()))
+
+    def _is_known_signature(self, signature):
+        cutoff = time.time() - CONFIG["DUPLICATE_WINDOW_HOURS"] * 3600
+        matches = self.perceptual_index.search(
+            _split_signature(signature), CONFIG["PERCEPTUAL_MAX_DISTANCE"])
+        return any(ts >= cutoff for _, (_, ts) in matches)
+
+    def _load_recent_ids(self):
+        rows = self.db.query(
+            "SELECT id, posted_at FROM processed "
+            "WHERE posted_at >= ? ORDER BY posted_at", (self._cutoff(),))
+        for video_id, posted_at in rows:
+            self.processed_ids.add(
+                video_id, datetime.fromisoformat(posted_at).timestamp())
+
+    def filter_new(self, ids):
+        ids = list(dict.fromkeys(str(i) for i in ids))
+        misses = [i for i in ids if i not in self.processed_ids]
+        found = set()
+        cutoff = self._cutoff()
+        for start in range(0, len(misses), 500):
+            chunk = misses[start:start + 500]
+            rows = self.db.query(
+                "SELECT id, posted_at FROM processed WHERE posted_at >= ? "
+                f"AND id IN ({','.join('?' * len(chunk))})",
+                (cutoff, *chunk))
+            for video_id, posted_at in rows:
+                found.add(video_id)
+                self.processed_ids.add(
+                    video_id, datetime.fromisoformat(posted_at).timestamp())
+        return [i for i in misses if i not in found]
+
+    def _memo_entry(self, filepath):
+        st = os.stat(filepath)
+        key = (os.path.abspath(filepath), st.st_size, st.st_mtime_ns)
+        entry = self._fingerprints.get(key)
+        if entry is None:
+            if len(self._fingerprints) >= self.MEMO_SIZE:
+                del self._fingerprints[next(iter(self._fingerprints))]
+            entry = self._fingerprints[key] = {}
+        return entry, st
+
+    def prime_fingerprint(self, filepath, **digests):
+        entry, _ = self._memo_entry(filepath)
+        entry.update((k, v) for k, v in digests.items() if v)
+
+    def _fingerprint(self, filepath, kind):
+        try:
+            entry, st = self._memo_entry(filepath)
+            if kind not in entry:
+                if kind == "sample":
+                    entry[kind] = _sampled_digest(filepath, st.st_size)
+                elif kind == "phash":
+                    entry[kind] = _perceptual_digest(filepath)
+                else:
+                    entry[kind] = _full_digest(filepath)
+            return entry[kind]
+        except Exception:
+            return None
+
+    def _calculate_hash(self, filepath):
+        return self._fingerprint(filepath, "full")
+
+    def probe(self, filepath):
+        key = self._sample_hash(filepath)
+        if key is None:
+            return None
+        info = self._probes.get(key)
+        if info is None:
+            try:
+                info = _probe_video(filepath)
+            except Exception:
+                return None
+            if len(self._probes) >= self.MEMO_SIZE:
+                del self._probes[next(iter(self._probes))]
+            self._probes[key] = info
+        return info
+
+    def _sample_hash(self, filepath):
+        return self._fingerprint(filepath, "sample")
+
+    def perceptual_signature(self, filepath):
+        if not CONFIG["PERCEPTUAL_DEDUP"]:
+            return None
+        return self._fingerprint(filepath, "phash")
+
+    def _is_known_file(self, filepath):
+        if (CONFIG["FINGERPRINT_MODE"] == "sampled"
+                and time.time() >= self._legacy_until):
+            sample = self._sample_hash(filepath)
+            if not sample or bytes.fromhex(sample) not in self.processed_samples:
+                return False
+        file_hash = self._calculate_hash(filepath)
+        return bool(file_hash) and bytes.fromhex(file_hash) in self.processed_hashes
+
+    def _is_known_digest(self, file_hash, sample_hash=None):
+        if (sample_hash and time.time() >= self._legacy_until
+                and bytes.fromhex(sample_hash) not in self.processed_samples):
+            return False
+        return bytes.fromhex(file_hash) in self.processed_hashes
+
+    def is_known_prefix(self, prefix_hash):
+        return bool(prefix_hash) and (
+            bytes.fromhex(prefix_hash) in self.processed_prefixes)
+
+    def is_duplicate(self, video_id=None, filepath=None, signature=None,
+                     file_hash=None, sample_hash=None):
+        if file_hash and self._is_known_digest(file_hash, sample_hash):
+            return True
+        if filepath and not file_hash and self._is_known_file(filepath):
+            return True
+        if signature and self._is_known_signature(signature):
+            return True
+        if video_id and not self.filter_new([video_id]):
+            return True
+        return False
+
+    def _insert_row(self, durable=False, **row):
+        row["posted_at"] = datetime.now().isoformat()
+        self.db.execute(
+            f"INSERT OR REPLACE INTO processed ({', '.join(row)}) "
+            f"VALUES ({', '.join('?' * len(row))})",
+            tuple(row.values()), durable=durable)
+
+    def register_success(self, video_id, filepath, source, caption,
+                         signature=None, file_hash=None, sample_hash=None,
+                         prefix_hash=None):
+        video_hash = file_hash or (
+            self._calculate_hash(filepath) if filepath else None)
+        if not file_hash:
+            sample_hash = self._sample_hash(filepath) if filepath else None
+        self._insert_row(durable=True, id=video_id, video_hash=video_hash,
+                         source=source, caption=caption, status="success",
+                         error_msg=None, sample_hash=sample_hash,
+                         prefix_hash=prefix_hash, phash=signature)
+        if prefix_hash:
+            self.processed_prefixes.add(bytes.fromhex(prefix_hash))
+        if signature:
+            self._add_signature(str(video_id), signature)
+        self.processed_ids.add(str(video_id))
+        if video_hash:
+            self.processed_hashes.add(bytes.fromhex(video_hash))
+        if sample_hash:
+            self.processed_samples.add(bytes.fromhex(sample_hash))
+
+    def register_encode_metrics(self, video_id, metrics):
+        self.db.execute(
+            "INSERT INTO encode_metrics (video_id, encoded_at, mode, "
+            "wall_seconds, speed, bitrate_kbps, frames, fps) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(video_id), datetime.now().isoformat(), metrics.get("mode"),
+             metrics.get("wall_seconds"), metrics.get("speed"),
+             metrics.get("bitrate_kbps"), metrics.get("frames"),
+             metrics.get("fps")))
+
+    def save_work_item(self, item, stage, source="tiktok"):
+        payload = json.dumps({"signature": item.get("signature"),
+                              "download": item.get("download")})
+        self.db.execute(
+            "INSERT INTO work_items (id, source, stage, caption, raw_path, "
+            "output_path, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET stage = excluded.stage, "
+            "caption = excluded.caption, raw_path = excluded.raw_path, "
+            "output_path = excluded.output_path, payload = excluded.payload, "
+            "updated_at = excluded.updated_at",
+            (str(item["video_id"]), source, stage, item.get("caption"),
+             str(item["raw_path"]) if item.get("raw_path") else None,
+             str(item["output_path"]) if item.get("output_path") else None,
+             payload, datetime.now().isoformat()),
+            durable=True)
+        item["stage"] = stage
+
+    def fail_work_item(self, video_id, error_msg):
+        self.db.execute(
+            "UPDATE work_items SET attempts = attempts + 1, last_error = ?, "
+            "stage = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE stage END, "
+            "updated_at = ? WHERE id = ?",
+            (str(error_msg)[:500], CONFIG["WORK_MAX_ATTEMPTS"],
+             datetime.now().isoformat(), str(video_id)),
+            durable=True)
+
+    def complete_work_item(self, video_id):
+        self.db.execute(
+            "UPDATE work_items SET stage = 'uploaded', updated_at = ? "
+            "WHERE id = ?", (datetime.now().isoformat(), str(video_id)),
+            durable=True)
+
+    def resumable_work_items(self, source, limit):
+        rows = self.db.query(
+            "SELECT id, stage, caption, raw_path, output_path, payload "
+            "FROM work_items WHERE source = ? "
+            "AND stage IN ('downloaded', 'encoded') ORDER BY updated_at",
+            (source,))
+        new_ids = set(self.filter_new(row[0] for row in rows))
+        items = []
+        for video_id, stage, caption, raw_path, output_path, payload in rows:
+            if len(items) >= limit:
+                break
+            if video_id not in new_ids:
+                self.complete_work_item(video_id)
+                continue
+            if stage == "encoded" and not (
+                    output_path and os.path.exists(output_path)):
+                stage = "downloaded"
+            if stage == "downloaded" and not (
+                    raw_path and os.path.exists(raw_path)):
+                self.db.execute(
+                    "UPDATE work_items SET stage = 'failed', last_error = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    ("Missing files on resume", datetime.now().isoformat(),
+                     video_id), durable=True)
+                continue
+            data = json.loads(payload or "{}")
+            items.append({
+                "video_id": video_id, "stage": stage, "caption": caption,
+                "raw_path": raw_path,
+                "output_path": Path(output_path) if output_path else None,
+                "signature": data.get("signature"),
+                "download": data.get("download") or {}})
+        return items
+
+    def register_error(self, video_id, source, error_msg):
+        self._insert_row(id=video_id, video_hash=None, source=source,
+                         caption=None, status="error",
+                         error_msg=str(error_msg)[:500])
+        self.processed_ids.add(str(video_id))
+
+
+def _ensure_directory(path):
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
+class RetryPolicy:
+    FATAL_ERRORS = {
+        "FileNotFoundError", "PermissionError", "IsADirectoryError",
+        "DownloadLimitError", "DownloadAborted", "EncodeCancelled",
+        "BadPassword", "BadCredentials", "TwoFactorRequired",
+        "ChallengeRequired", "ReloginAttemptExceeded", "UserNotFound",
+    }
+
+    def __init__(self, max_attempts=None, budget=None, should_stop=None):
+        self.max_attempts = max_attempts or CONFIG["MAX_RETRIES"]
+        self.budget = budget or CONFIG["RETRY_BUDGET_SECONDS"]
+        self.should_stop = should_stop or (lambda: False)
+
+    def is_retryable(self, exc):
+        while exc is not None:
+            names = {cls.__name__ for cls in type(exc).__mro__}
+            if names & self.FATAL_ERRORS:
+                return False
+            exc = exc.__cause__
+        return True
+
+    def backoff(self, attempt):
+        ceiling = min(CONFIG["RETRY_MAX_DELAY_SECONDS"],
+                      CONFIG["RETRY_BACKOFF_MULTIPLIER"]
+                      * CONFIG["RETRY_BACKOFF_BASE"] ** attempt)
+        if CONFIG["RETRY_FULL_JITTER"]:
+            return random.uniform(0, ceiling)
+        jitter = ceiling * CONFIG["RANDOM_JITTER_PERCENT"] / 100
+        return max(0.0, ceiling + random.uniform(-jitter, jitter))
+
+    def _next_delay(self, exc, attempt, deadline):
+        if (attempt + 1 >= self.max_attempts or not self.is_retryable(exc)
+                or self.should_stop()):
+            return None
+        delay = self.backoff(attempt)
+        if time.monotonic() + delay > deadline:
+            return None
+        return delay
+
+    def run(self, func, *args, **kwargs):
+        deadline = time.monotonic() + self.budget
+        for attempt in range(self.max_attempts):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                last_error = e
+            end = time.monotonic() + delay
+            while time.monotonic() < end and not self.should_stop():
+                time.sleep(min(0.5, end - time.monotonic()))
+            # Un stop durante la espera no debe lanzar otro intento
+            if self.should_stop():
+                raise last_error
+
+    async def run_async(self, func, *args, **kwargs):
+        deadline = time.monotonic() + self.budget
+        for attempt in range(self.max_attempts):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._next_delay(e, attempt, deadline)
+                if delay is None:
+                    raise
+                last_error = e
+            end = time.monotonic() + delay
+            while time.monotonic() < end and not self.should_stop():
+                await asyncio.sleep(min(0.5, end - time.monotonic()))
+            if self.should_stop():
+                raise last_error
+
+
+def _build_caption(tiktok_desc=None):
+    template = CONFIG["POST_CAPTION_TEMPLATE"]
+    base = (template.format(desc=tiktok_desc)
+            if tiktok_desc and "{desc}" in template else template)
+    return f"{base} {CONFIG['POST_HASHTAGS']}".strip()
+
+
+def _get_upload_extra_data():
+    data = {
+        "like_and_view_counts_disabled": 1 if CONFIG["DISABLE_LIKE_COUNTS"] else 0,
+        "disable_comments": 1 if CONFIG["DISABLE_COMMENTS"] else 0,
+    }
+    if CONFIG["ENABLE_ALT_TEXT"]:
+        data["custom_accessibility_caption"] = CONFIG["ALT_TEXT"]
+    return data
+
+
+def _ensure_ffmpeg():
+    import imageio
+    try:
+        imageio.plugins.ffmpeg.get_exe()
+    except imageio.core.NeedDownloadError:
+        imageio.plugins.ffmpeg.download()
+
+
+def _session_id(settings):
+    auth = settings.get("authorization_data") or {}
+    cookies = settings.get("cookies") or {}
+    return auth.get("sessionid") or cookies.get("sessionid")
+
+
+class InstagramSession:
+    # PleaseWaitFewMinutes es un limite de tasa: se reintenta con backoff
+    # en RetryPolicy, un re-login forzado solo acaba en challenge
+    AUTH_ERRORS = {"LoginRequired", "ReloginAttemptExceeded"}
+
+    def __init__(self):
+        self._client = None
+        self._username = None
+        self._lock = threading.Lock()
+
+    @property
+    def session_path(self):
+        return Path(CONFIG["DATA_FOLDER"]) / "ig_session.json"
+
+    def _stored_settings(self):
+        try:
+            with open(self.session_path, encoding="utf-8") as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return settings if isinstance(settings, dict) else None
+
+    def _is_fresh(self, settings):
+        # Validacion local: cookie de sesion, usuario y antiguedad
+        if not settings or not _session_id(settings):
+            return False
+        age = time.time() - float(settings.get("last_login") or 0)
+        return age < CONFIG["INSTAGRAM_SESSION_MAX_AGE_HOURS"] * 3600
+
+    def _new_client(self):
+        from instagrapi import Client
+        return Client()
+
+    def _dump(self, cl):
+        # instagrapi no guarda el usuario: se anota para no reutilizar las
+        # cookies de otra cuenta si cambia INSTAGRAM_USERNAME
+        settings = dict(cl.get_settings(),
+                        username=CONFIG["INSTAGRAM_USERNAME"])
+        _ensure_directory(CONFIG["DATA_FOLDER"])
+        tmp = self.session_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(settings, f)
+        os.replace(tmp, self.session_path)
+
+    def _login(self, force=False):
+        cl = self._new_client()
+        settings = self._stored_settings()
+        if settings and settings.get("username") != CONFIG["INSTAGRAM_USERNAME"]:
+            settings = None
+        if settings:
+            cl.set_settings(settings)
+        if force or not self._is_fresh(settings):
+            cl.login(CONFIG["INSTAGRAM_USERNAME"], CONFIG["INSTAGRAM_PASSWORD"],
+                     relogin=bool(settings))
+            self._dump(cl)
+        return cl
+
+    def client(self):
+        with self._lock:
+            if (self._client is None
+                    or self._username != CONFIG["INSTAGRAM_USERNAME"]):
+                self._client = RetryPolicy().run(self._login)
+                self._username = CONFIG["INSTAGRAM_USERNAME"]
+            return self._client
+
+    def refresh(self, stale=None):
+        with self._lock:
+            # Otro hilo puede haber renovado ya la sesion
+            if stale is None or self._client is stale:
+                self._client = RetryPolicy().run(self._login, True)
+                self._username = CONFIG["INSTAGRAM_USERNAME"]
+            return self._client
+
+    def is_auth_error(self, exc):
+        return bool({cls.__name__ for cls in type(exc).__mro__}
+                    & self.AUTH_ERRORS)
+
+    def call(self, func):
+        cl = self.client()
+        try:
+            return func(cl)
+        except Exception as e:
+            if not self.is_auth_error(e):
+                raise
+            return func(self.refresh(stale=cl))
+
+    def reset(self):
+        with self._lock:
+            self._client = None
+
+
+_ig_session = InstagramSession()
+
+
+def _instagram_login():
+    _ig_session.client()
+    return _ig_session
+
+
+def _upload_reel(ig_session, filepath, caption, should_stop=None):
+    def _upload():
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Not found: {filepath}")
+        media = ig_session.call(lambda cl: cl.clip_upload(
+            filepath, caption, extra_data=_get_upload_extra_data()))
+        return media.dict() if hasattr(media, "dict") else {}
+    return RetryPolicy(should_stop=should_stop).run(_upload)
+
+
+class DownloadLimitError(RuntimeError):
+    pass
+
+
+class DownloadAborted(Exception):
+    pass
+
+
+class StreamHasher:
+    def __init__(self, size=None):
+        self.size = size
+        self.pos = 0
+        self.full = hashlib.sha256()
+        sample = CONFIG["FINGERPRINT_SAMPLE_BYTES"]
+        if size is None:
+            self.windows = []
+        elif size <= sample * 3:
+            self.windows = [(0, size)]
+        else:
+            mid = (size - sample) // 2
+            self.windows = [(0, sample), (mid, mid + sample),
+                            (size - sample, size)]
+        self.parts = [bytearray() for _ in self.windows]
+        self.prefix = None
+
+    def update(self, chunk):
+        self.full.update(chunk)
+        end = self.pos + len(chunk)
+        for (lo, hi), part in zip(self.windows, self.parts):
+            lo, hi = max(lo, self.pos), min(hi, end)
+            if lo < hi:
+                part += chunk[lo - self.pos:hi - self.pos]
+        self.pos = end
+        if (self.prefix is None and self.windows
+                and self.pos >= self.windows[0][1]):
+            h = hashlib.blake2b(digest_size=16)
+            h.update(self.size.to_bytes(8, "little"))
+            h.update(self.parts[0])
+            self.prefix = h.hexdigest()
+
+    def hexdigest(self):
+        return self.full.hexdigest()
+
+    def sample_hexdigest(self):
+        if not self.windows or self.pos != self.size:
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        h.update(self.size.to_bytes(8, "little"))
+        for part in self.parts:
+            h.update(part)
+        return h.hexdigest()
+
+
+class Downloader:
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=CONFIG["DOWNLOAD_POOL_SIZE"])
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def fetch(self, url, dest, on_prefix=None):
+        import requests
+        dest = str(dest)
+        part = dest + ".part"
+        deadline = time.monotonic() + CONFIG["DOWNLOAD_TIMEOUT_SECONDS"]
+        ticket = _governor.acquire(
+            mem_mb=CONFIG["GOVERNOR_DOWNLOAD_MEM_MB"],
+            disk_mb=CONFIG["GOVERNOR_DOWNLOAD_DISK_MB"],
+            timeout=deadline - time.monotonic())
+        if ticket is None:
+            raise RuntimeError("Download failed: no resource headroom")
+        last_error = None
+        try:
+            for _ in range(CONFIG["DOWNLOAD_MAX_ATTEMPTS"]):
+                try:
+                    return self._fetch_once(url, dest, part, deadline,
+                                            on_prefix)
+                except (DownloadLimitError, DownloadAborted):
+                    self._discard(part)
+                    raise
+                except (requests.RequestException, OSError) as e:
+                    last_error = e
+                    if time.monotonic() >= deadline:
+                        break
+            self._discard(part)
+        finally:
+            _governor.release(ticket)
+        raise RuntimeError(f"Download failed: {last_error}") from last_error
+
+    def _discard(self, part):
+        for path in (part, part + ".meta"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _validator(self, part):
+        try:
+            with open(part + ".meta", encoding="utf-8") as f:
+                return json.load(f).get("validator")
+        except (OSError, ValueError):
+            return None
+
+    def _fetch_once(self, url, dest, part, deadline, on_prefix=None):
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        validator = self._validator(part) if offset else None
+        # Sin ETag/Last-Modified no se puede saber si es el mismo fichero
+        if offset and not validator:
+            self._discard(part)
+            offset = 0
+        headers = ({"Range": f"bytes={offset}-", "If-Range": validator}
+                   if offset else {})
+        timeout = (CONFIG["DOWNLOAD_CONNECT_TIMEOUT"],
+                   CONFIG["DOWNLOAD_READ_TIMEOUT"])
+        with self.session.get(url, headers=headers, stream=True,
+                              timeout=timeout) as r:
+            if offset and r.status_code == 416:
+                self._discard(part)
+                return self._fetch_once(url, dest, part, deadline, on_prefix)
+            if offset and r.status_code == 206:
+                total = r.headers.get("Content-Range", "").rpartition("/")[2]
+                mode = "ab"
+            else:
+                r.raise_for_status()
+                offset = 0
+                total = r.headers.get("Content-Length", "")
+                mode = "wb"
+                etag = r.headers.get("ETag", "")
+                validator = (etag if etag and not etag.startswith("W/")
+                             else r.headers.get("Last-Modified"))
+                with open(part + ".meta", "w", encoding="utf-8") as f:
+                    json.dump({"validator": validator}, f)
+            total = int(total) if total.isdigit() else None
+            if total and total > CONFIG["DOWNLOAD_MAX_BYTES"]:
+                raise DownloadLimitError(f"File too large: {total} bytes")
+
+            hasher = StreamHasher(total)
+            if offset:
+                with open(part, "rb") as f:
+                    for chunk in iter(lambda: f.read(
+                            CONFIG["DOWNLOAD_CHUNK_BYTES"]), b""):
+                        hasher.update(chunk)
+
+            with open(part, mode) as f:
+                for chunk in self._checked_chunks(r, hasher, deadline,
+                                                  on_prefix):
+                    f.write(chunk)
+
+        if total is not None and hasher.pos != total:
+            raise OSError(f"Incomplete download: {hasher.pos}/{total} bytes")
+        os.replace(part, dest)
+        self._discard(part)
+        return dict(self._digests(hasher), path=dest)
+
+    def _checked_chunks(self, r, hasher, deadline, on_prefix):
+        for chunk in r.iter_content(CONFIG["DOWNLOAD_CHUNK_BYTES"]):
+            prefix = hasher.prefix
+            hasher.update(chunk)
+            if (on_prefix and prefix is None and hasher.prefix
+                    and on_prefix(hasher.prefix)):
+                raise DownloadAborted("Known prefix fingerprint")
+            if hasher.pos > CONFIG["DOWNLOAD_MAX_BYTES"]:
+                raise DownloadLimitError(
+                    f"File too large: >{hasher.pos} bytes")
+            if time.monotonic() > deadline:
+                raise DownloadLimitError("Download timed out")
+            yield chunk
+
+    def _digests(self, hasher):
+        return {"size": hasher.pos, "sha256": hasher.hexdigest(),
+                "sample_hash": hasher.sample_hexdigest(),
+                "prefix_hash": hasher.prefix}
+
+    def stream(self, url, on_prefix=None):
+        deadline = time.monotonic() + CONFIG["DOWNLOAD_TIMEOUT_SECONDS"]
+        r = self.session.get(url, stream=True,
+                             timeout=(CONFIG["DOWNLOAD_CONNECT_TIMEOUT"],
+                                      CONFIG["DOWNLOAD_READ_TIMEOUT"]))
+        r.raise_for_status()
+        total = r.headers.get("Content-Length", "")
+        total = int(total) if total.isdigit() else None
+        if total and total > CONFIG["DOWNLOAD_MAX_BYTES"]:
+            r.close()
+            raise DownloadLimitError(f"File too large: {total} bytes")
+        hasher = StreamHasher(total)
+        result = {}
+
+        def _chunks():
+            with r:
+                yield from self._checked_chunks(r, hasher, deadline, on_prefix)
+            if total is not None and hasher.pos != total:
+                raise OSError(
+                    f"Incomplete download: {hasher.pos}/{total} bytes")
+            result.update(self._digests(hasher))
+
+        return _chunks(), result
+
+
+_downloader = Downloader()
+
+
+def _mp4_layout(head):
+    pos = 0
+    while pos + 8 <= len(head):
+        size = int.from_bytes(head[pos:pos + 4], "big")
+        box = bytes(head[pos + 4:pos + 8])
+        if box in (b"moov", b"moof"):
+            return "streamable"
+        if box == b"mdat":
+            return "seekable"
+        if size == 1:
+            if pos + 16 > len(head):
+                return None
+            size = int.from_bytes(head[pos + 8:pos + 16], "big")
+        if size < 8:
+            return "seekable"
+        pos += size
+    return None
+
+
+def _streaming_tmp_dir():
+    path = CONFIG["STREAMING_TMP_DIR"] or (
+        "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+    path = Path(path) / "reels_stream"
+    _ensure_directory(path)
+    return path
+
+
+def _open_streaming_source(url, spool_path, on_prefix=None):
+    chunks, result = _downloader.stream(url, on_prefix)
+    head = bytearray()
+    buffered = []
+    layout = None
+    for chunk in chunks:
+        buffered.append(chunk)
+        head += chunk
+        layout = _mp4_layout(head)
+        if layout or len(head) >= CONFIG["STREAMING_SNIFF_BYTES"]:
+            break
+    body = itertools.chain(buffered, chunks)
+    if layout == "streamable":
+        return {"stdin": body, "path": None, "result": result}
+
+    # El contenedor necesita seek (moov al final): volcar a RAM/tmp
+    with open(spool_path, "wb") as f:
+        for chunk in body:
+            f.write(chunk)
+    return {"stdin": None, "path": str(spool_path), "result": result}
+
+
+# ─── NUEVAS FUNCIONES USANDO TikTokApi ───────────────────────────────
+class TikTokSession:
+    def __init__(self):
+        self._loop = None
+        self._thread = None
+        self._api = None
+        self._api_lock = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="tiktok-loop",
+                    daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            return future.result(CONFIG["TIKTOK_CALL_TIMEOUT"])
+        except BaseException:
+            # Sin esto la corrutina sigue viva tras el timeout y el _reset
+            # posterior compite con ella
+            future.cancel()
+            raise
+
+    async def _get_api(self):
+        if self._api_lock is None:
+            self._api_lock = asyncio.Lock()
+        async with self._api_lock:
+            if self._api is None:
+                generation = self._generation
+                from TikTokApi import TikTokApi
+                api = TikTokApi()
+                try:
+                    await api.__aenter__()
+                    await api.create_sessions(
+                        ms_tokens=[],
+                        num_sessions=CONFIG["TIKTOK_NUM_SESSIONS"],
+                        sleep_after=CONFIG["TIKTOK_WARMUP_SECONDS"])
+                except BaseException:
+                    await self._close_api(api)
+                    raise
+                # Un _reset durante la creacion invalida esta sesion
+                if generation != self._generation:
+                    await self._close_api(api)
+                    raise RuntimeError("TikTok session reset during creation")
+                self._api = api
+            return self._api
+
+    @staticmethod
+    async def _close_api(api):
+        try:
+            await api.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+    async def _reset(self):
+        self._generation += 1
+        api, self._api = self._api, None
+        if api is not None:
+            await self._close_api(api)
+
+    def _call(self, coro):
+        try:
+            return self.run(coro)
+        except Exception:
+            self.run(self._reset())
+            raise
+
+    def trending(self, count):
+        async def _fetch():
+            api = await self._get_api()
+            return [video async for video in api.trending.videos(count=count)]
+        return self._call(_fetch())
+
+    def video_url(self, video):
+        async def _get_url():
+            await self._get_api()
+            return await video.video.url()
+        return self._call(_get_url())
+
+    def video_urls(self, videos):
+        async def _get_urls():
+            await self._get_api()
+            policy = RetryPolicy()
+            return await asyncio.gather(
+                *(policy.run_async(video.video.url) for video in videos),
+                return_exceptions=True)
+        return [None if isinstance(url, BaseException) else url
+                for url in self._call(_get_urls())]
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            self.run(self._reset())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+
+
+_tiktok_session = TikTokSession()
+atexit.register(_tiktok_session.close)
+
+
+class CandidateQueue:
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+        self._refilling = threading.Event()
+
+    def __len__(self):
+        return len(self._items)
+
+    def _expire(self):
+        cutoff = time.time() - CONFIG["CANDIDATE_TTL_SECONDS"]
+        for key in [k for k, c in self._items.items()
+                    if c["queued_at"] < cutoff]:
+            del self._items[key]
+
+    def refill(self, data_mgr):
+        videos = _fetch_trending_tiktok()
+        new_ids = set(data_mgr.filter_new(v.id for v in videos))
+        fresh = [v for v in videos
+                 if str(v.id) in new_ids and str(v.id) not in self._items]
+        if not fresh:
+            return
+        urls = _tiktok_session.video_urls(fresh)
+        now = time.time()
+        with self._lock:
+            for video, url in zip(fresh, urls):
+                self._items[str(video.id)] = {
+                    "video": video, "url": url,
+                    "queued_at": now, "url_at": now}
+            while len(self._items) > CONFIG["CANDIDATE_MAX_ITEMS"]:
+                del self._items[next(iter(self._items))]
+
+    def refill_async(self, data_mgr):
+        if self._refilling.is_set():
+            return
+
+        def _run():
+            try:
+                self.refill(data_mgr)
+            except Exception:
+                pass
+            finally:
+                data_mgr.db.release()
+                self._refilling.clear()
+
+        self._refilling.set()
+        threading.Thread(target=_run, name="candidate-refill",
+                         daemon=True).start()
+
+    def take(self, count, data_mgr):
+        with self._lock:
+            self._expire()
+        if len(self) < count:
+            self.refill(data_mgr)
+        with self._lock:
+            self._expire()
+            new_ids = set(data_mgr.filter_new(self._items))
+            for key in [k for k in self._items if k not in new_ids]:
+                del self._items[key]
+            picks = random.sample(list(self._items.values()),
+                                  min(count, len(self._items)))
+            for c in picks:
+                del self._items[str(c["video"].id)]
+        if len(self) < CONFIG["CANDIDATE_LOW_WATERMARK"]:
+            self.refill_async(data_mgr)
+        return picks
+
+    def peek(self):
+        with self._lock:
+            return next(iter(self._items.values()), None)
+
+
+_candidates = CandidateQueue()
+
+
+def _fetch_trending_tiktok():
+    try:
+        return _tiktok_session.trending(CONFIG["TIKTOK_TRENDING_COUNT"])
+    except Exception as e:
+        raise RuntimeError(f"Error fetching trending videos: {e}") from e
+
+
+def _download_tiktok_video(video, output_dir, data_mgr=None, video_url=None):
+    video_id = video.id
+    create_time = getattr(video, 'create_time', int(time.time()))
+    filename = f"{create_time}_{video_id}.mp4"
+    filepath = os.path.join(output_dir, filename)
+
+    on_prefix = (data_mgr.is_known_prefix
+                 if data_mgr is not None and CONFIG["DOWNLOAD_EARLY_ABORT"]
+                 else None)
+    try:
+        video_url = video_url or _tiktok_session.video_url(video)
+        _ensure_directory(output_dir)
+        result = _downloader.fetch(video_url, filepath, on_prefix=on_prefix)
+        if data_mgr is not None:
+            data_mgr.prime_fingerprint(filepath, full=result["sha256"],
+                                       sample=result["sample_hash"])
+        return result
+    except DownloadAborted:
+        return None
+    except Exception as e:
+        raise RuntimeError(f"Error downloading video: {e}") from e
+
+
+def _startupinfo():
+    if not hasattr(subprocess, "STARTUPINFO"):
+        return None
+    si = subprocess.STARTUPINFO()
+    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return si
+
+
+def _prepare_watermark(watermark_path, opacity, scale=1.0):
+    src = Path(watermark_path)
+    st = src.stat()
+    key = hashlib.sha1(
+        f"{src.resolve()}|{st.st_size}|{st.st_mtime_ns}|"
+        f"{opacity:.3f}|{scale:.3f}".encode()).hexdigest()[:16]
+    cache_dir = Path(CONFIG["DATA_FOLDER"]) / "wm_cache"
+    baked = cache_dir / f"wm_{key}.png"
+    if baked.exists():
+        return str(baked)
+
+    _ensure_directory(cache_dir)
+    with Image.open(src) as img:
+        img = img.convert("RGBA")
+    if scale != 1.0:
+        img = img.resize((max(1, round(img.width * scale)),
+                          max(1, round(img.height * scale))),
+                         Image.Resampling.LANCZOS)
+    lut = [round(i * opacity) for i in range(256)]
+    img.putalpha(img.getchannel("A").point(lut))
+    tmp = baked.with_suffix(".tmp.png")
+    img.save(tmp)
+    os.replace(tmp, baked)
+    return str(baked)
+
+
+def _encoder_args(profile_name, bitrate):
+    profile = ENCODER_PROFILES[profile_name]
+    args = ["-c:v", "libx264", "-preset", profile["preset"]]
+    if profile["crf"] is not None:
+        kbps = int(bitrate.rstrip("kK"))
+        args += ["-crf", str(profile["crf"]),
+                 "-maxrate", bitrate, "-bufsize", f"{kbps * 2}k"]
+    else:
+        args += ["-b:v", bitrate]
+    if profile["tune"]:
+        args += ["-tune", profile["tune"]]
+    if profile["threads"]:
+        args += ["-threads", str(profile["threads"])]
+    if profile["x264_params"]:
+        args += ["-x264-params", profile["x264_params"]]
+    return args
+
+
+class EncodeCancelled(RuntimeError):
+    pass
+
+
+class EncodeScheduler:
+    def __init__(self, workers=None):
+        self._workers_override = workers
+        self.workers = None
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._running = {}
+        self._threads = []
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _resolve_workers(self):
+        return (self._workers_override or CONFIG["ENCODE_WORKERS"]
+                or max(1, (os.cpu_count() or 1) // 4))
+
+    @staticmethod
+    def staging_dir(directory):
+        # Mismo directorio (y sistema de archivos) que la salida: os.replace
+        # es atomico y nunca queda un processed_*.mp4 a medias
+        return Path(directory) / ".encode_tmp"
+
+    def threads_per_job(self):
+        return max(1, (os.cpu_count() or 1)
+                   // (self.workers or self._resolve_workers()))
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            # Se resuelve al arrancar para respetar run --config y cambios
+            # posteriores de CONFIG
+            self.workers = self._resolve_workers()
+            staging = self.staging_dir(CONFIG["OUTPUT_FOLDER"])
+            if staging.exists():
+                for stale in staging.iterdir():
+                    stale.unlink(missing_ok=True)
+            for n in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"encode-{n}",
+                                     daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, cmd, output_path, priority=10, duration=None,
+               on_progress=None, stdin=None):
+        self._start()
+        job = {"cmd": list(cmd), "output": Path(output_path),
+               "done": threading.Event(), "error": None, "cancelled": False,
+               "generation": self._generation, "duration": duration or 0,
+               "on_progress": on_progress, "progress": {}, "metrics": None,
+               "stdin": stdin, "feed_error": None}
+        self._queue.put((priority, next(self._seq), job))
+        return job
+
+    def run(self, cmd, output_path, priority=10, duration=None,
+            on_progress=None, stdin=None):
+        job = self.submit(cmd, output_path, priority, duration, on_progress,
+                          stdin)
+        job["done"].wait()
+        if job["error"]:
+            raise job["error"]
+        return job["metrics"]
+
+    def cancel_all(self):
+        with self._lock:
+            self._generation += 1
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            job["error"] = EncodeCancelled("Encode cancelled")
+            job["done"].set()
+        with self._lock:
+            running = list(self._running.values())
+        for job, proc in running:
+            job["cancelled"] = True
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+    def _cost(self, job):
+        cpu = min(100.0, self.threads_per_job() * 100 / (os.cpu_count() or 1))
+        # Salida estimada a ~4 Mbit/s, el doble por el temporal
+        disk_mb = (job["duration"] or 60) * 0.5 * 2
+        return cpu, CONFIG["GOVERNOR_ENCODE_MEM_MB"], disk_mb
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            ticket = None
+            try:
+                ticket = _governor.acquire(
+                    *self._cost(job), should_stop=lambda: (
+                        job["generation"] != self._generation))
+                if ticket is None:
+                    raise EncodeCancelled("Encode cancelled")
+                self._execute(job)
+            except Exception as e:
+                job["error"] = e
+            finally:
+                if ticket is not None:
+                    _governor.release(ticket)
+                job["done"].set()
+
+    def _feed(self, job, proc):
+        try:
+            for chunk in job["stdin"]:
+                proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass
+        except Exception as e:
+            job["feed_error"] = e
+            proc.kill()
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    def _execute(self, job):
+        staging = self.staging_dir(job["output"].parent)
+        _ensure_directory(staging)
+        tmp = staging / f"{uuid.uuid4().hex}{job['output'].suffix}"
+        cmd = job["cmd"][:-1]
+        if "-threads" not in cmd:
+            cmd += ["-threads", str(self.threads_per_job())]
+        cmd += ["-progress", "pipe:1", "-nostats", str(tmp)]
+        started = time.monotonic()
+        try:
+            proc = subprocess.Popen(
+                cmd, startupinfo=_startupinfo(),
+                stdin=subprocess.PIPE if job["stdin"] else None,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            with self._lock:
+                self._running[id(job)] = (job, proc)
+                if job["generation"] != self._generation:
+                    job["cancelled"] = True
+                    proc.kill()
+            stderr_tail = deque(maxlen=50)
+            drain = threading.Thread(
+                target=lambda: stderr_tail.extend(
+                    line.decode("utf-8", "replace") for line in proc.stderr),
+                daemon=True)
+            drain.start()
+            feeder = None
+            if job["stdin"]:
+                feeder = threading.Thread(target=self._feed,
+                                          args=(job, proc), daemon=True)
+                feeder.start()
+            try:
+                self._read_progress(job, proc.stdout, started)
+                proc.wait()
+                drain.join()
+                if feeder:
+                    feeder.join()
+            finally:
+                with self._lock:
+                    self._running.pop(id(job), None)
+            if job["cancelled"]:
+                raise EncodeCancelled("Encode cancelled")
+            if job["feed_error"]:
+                raise job["feed_error"]
+            if proc.returncode != 0:
+                raise RuntimeError(f"FFmpeg error: {''.join(stderr_tail)}")
+            os.replace(tmp, job["output"])
+        finally:
+            tmp.unlink(missing_ok=True)
+
+        wall = time.monotonic() - started
+        progress = job["progress"]
+        duration = job["duration"] or progress.get("out_time", 0)
+        size = job["output"].stat().st_size
+        job["metrics"] = {
+            "wall_seconds": round(wall, 3),
+            "speed": round(duration / wall, 3) if duration and wall else 0,
+            "bitrate_kbps": round(size * 8 / duration / 1000, 1)
+                            if duration else 0,
+            "frames": progress.get("frame", 0),
+            "fps": round(progress.get("frame", 0) / wall, 2) if wall else 0,
+        }
+
+    def _read_progress(self, job, stream, started):
+        raw = {}
+        for line in stream:
+            key, _, value = line.decode("utf-8", "replace").strip().partition("=")
+            raw[key] = value
+            if key != "progress":
+                continue
+            job["progress"] = _parse_progress(
+                raw, job["duration"], time.monotonic() - started)
+            if job["on_progress"]:
+                try:
+                    job["on_progress"](job["progress"])
+                except Exception:
+                    pass
+
+
+def _parse_progress(raw, duration, elapsed):
+    def num(key):
+        try:
+            return float(raw.get(key, "").rstrip("x"))
+        except ValueError:
+            return 0.0
+
+    out_time = num("out_time_us") / 1e6
+    speed = num("speed")
+    eta = (max(0.0, duration - out_time) / speed
+           if duration and speed else None)
+    return {
+        "frame": int(num("frame")), "fps": num("fps"), "speed": speed,
+        "out_time": out_time, "elapsed": elapsed, "eta": eta,
+        "percent": min(100.0, out_time * 100 / duration) if duration else None,
+        "done": raw.get("progress") == "end",
+    }
+
+
+_encoder = EncodeScheduler()
+
+
+def _probe_video(path):
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-print_format", "json",
+         "-show_streams", "-show_format", str(path)],
+        startupinfo=_startupinfo(), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"FFprobe error: {result.stderr}")
+    data = json.loads(result.stdout)
+    streams = data.get("streams", [])
+    video = next((st for st in streams if st.get("codec_type") == "video"), {})
+    audio = next((st for st in streams if st.get("codec_type") == "audio"), {})
+    return {
+        "width": video.get("width"), "height": video.get("height"),
+        "vcodec": video.get("codec_name"), "pix_fmt": video.get("pix_fmt"),
+        "acodec": audio.get("codec_name"),
+        "duration": float(data.get("format", {}).get("duration") or 0),
+    }
+
+
+def _choose_encode_path(probe, has_wm, enhance):
+    if probe is None or has_wm or enhance:
+        return "full"
+    if (probe["vcodec"] != "h264"
+            or (probe["width"], probe["height"]) != (TARGET_W, TARGET_H)
+            or probe["pix_fmt"] not in ("yuv420p", "yuvj420p")):
+        return "full"
+    if probe["acodec"] in ("aac", None):
+        return "copy"
+    return "audio"
+
+
+def _process_video_ffmpeg(input_path, output_path, watermark_path=None,
+                          wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k",
+                          profile=None, probe=None, priority=10,
+                          on_progress=None, stdin=None):
+    has_wm = watermark_path and os.path.exists(watermark_path)
+    path = _choose_encode_path(probe, has_wm, enhance)
+    duration = probe["duration"] if probe else None
+    if path != "full":
+        cmd = ["ffmpeg", "-y", "-v", "error", "-i", str(input_path),
+               "-map", "0:v:0", "-map", "0:a:0?", "-c:v", "copy"]
+        cmd += (["-c:a", "copy"] if path == "copy"
+                else ["-c:a", "aac", "-b:a", "128k"])
+        cmd += ["-movflags", "+faststart", str(output_path)]
+        metrics = _encoder.run(cmd, output_path, priority, duration,
+                               on_progress, stdin)
+        return dict(metrics, mode=path)
+
+    filters = [
+        f"[0:v]scale={TARGET_W}:{TARGET_H}:"
+        f"force_original_aspect_ratio=decrease,"
+        f"pad={TARGET_W}:{TARGET_H}:(ow-iw)/2:(oh-ih)/2:black"
+    ]
+    if enhance:
+        filters[0] += ",unsharp=5:5:1.0:5:5:0.5"
+
+    if has_wm:
+        filters[0] += "[base]"
+        filters.append(f"[base][1:v]overlay={wx}:{wy}")
+
+    cmd = ["ffmpeg", "-y", "-v", "error", "-i", str(input_path)]
+    if has_wm:
+        cmd.extend(["-i", _prepare_watermark(watermark_path, opacity)])
+    cmd.extend([
+        "-filter_complex", ";".join(filters) if has_wm else filters[0],
+        *_encoder_args(profile or CONFIG["ENCODER_PROFILE"], bitrate),
+        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart",
+        str(output_path),
+    ])
+
+    metrics = _encoder.run(cmd, output_path, priority, duration, on_progress,
+                           stdin)
+    return dict(metrics, mode=path)
+
+
+def _measure_ssim(encoded_path, reference_path):
+    graph = (f"[1:v]scale={TARGET_W}:{TARGET_H}:"
+             f"force_original_aspect_ratio=decrease,"
+             f"pad={TARGET_W}:{TARGET_H}:(ow-iw)/2:(oh-ih)/2:black[ref];"
+             f"[0:v][ref]ssim")
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-i", str(encoded_path),
+         "-i", str(reference_path), "-lavfi", graph, "-f", "null", "-"],
+        startupinfo=_startupinfo(), capture_output=True, text=True)
+    match = re.search(r"All:([\d.]+)", result.stderr)
+    if not match:
+        raise RuntimeError(f"SSIM failed: {result.stderr[-500:]}")
+    return float(match.group(1))
+
+
+def _calibration_path():
+    return Path(CONFIG["DATA_FOLDER"]) / "encoder_calibration.json"
+
+
+def _load_encoder_calibration():
+    try:
+        data = json.loads(_calibration_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("profile") in ENCODER_PROFILES:
+        CONFIG["ENCODER_PROFILE"] = data["profile"]
+    return data
+
+
+def _calibrate_encoder(sample_path, target_ssim=None, seconds=None):
+    target_ssim = target_ssim or CONFIG["CALIBRATION_TARGET_SSIM"]
+    seconds = seconds or CONFIG["CALIBRATION_SECONDS"]
+    work = Path(CONFIG["DATA_FOLDER"]) / "calibration"
+    _ensure_directory(work)
+    clip = work / "sample.mp4"
+    subprocess.run(
+        ["ffmpeg", "-y", "-v", "error", "-i", str(sample_path),
+         "-t", str(seconds), "-c", "copy", str(clip)],
+        startupinfo=_startupinfo(), check=True, capture_output=True)
+
+    results = []
+    try:
+        for name in ENCODER_PROFILES:
+            out = work / f"{name}.mp4"
+            start = time.perf_counter()
+            _process_video_ffmpeg(clip, out, enhance=False,
+                                  bitrate=CONFIG["VIDEO_BITRATE"],
+                                  profile=name)
+            elapsed = time.perf_counter() - start
+            results.append({"profile": name, "seconds": round(elapsed, 3),
+                            "ssim": _measure_ssim(out, clip)})
+    finally:
+        for f in work.glob("*.mp4"):
+            f.unlink()
+
+    passing = [r for r in results if r["ssim"] >= target_ssim]
+    best = (min(passing, key=lambda r: r["seconds"]) if passing
+            else max(results, key=lambda r: r["ssim"]))
+    data = {"profile": best["profile"], "target_ssim": target_ssim,
+            "calibrated_at": datetime.now().isoformat(), "results": results}
+    _calibration_path().write_text(json.dumps(data, indent=2),
+                                   encoding="utf-8")
+    CONFIG["ENCODER_PROFILE"] = best["profile"]
+    return data
+
+
+class RenderCache:
+    @property
+    def root(self):
+        return Path(CONFIG["DATA_FOLDER"]) / "render_cache"
+
+    def key(self, input_hash, watermark_hash, wx, wy, opacity, enhance,
+            bitrate, profile):
+        payload = json.dumps({
+            "input": input_hash, "size": [TARGET_W, TARGET_H],
+            "watermark": watermark_hash, "opacity": round(opacity, 3),
+            "position": [int(wx), int(wy)], "enhance": bool(enhance),
+            "bitrate": bitrate, "profile": profile,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key, dest):
+        cached = self.root / f"{key}.mp4"
+        if not cached.exists():
+            return False
+        os.utime(cached)
+        _link_or_copy(cached, dest)
+        return True
+
+    def put(self, key, src):
+        _ensure_directory(self.root)
+        cached = self.root / f"{key}.mp4"
+        tmp = cached.with_suffix(".tmp")
+        _link_or_copy(src, tmp)
+        os.replace(tmp, cached)
+        self._evict()
+
+    def _evict(self):
+        limit = CONFIG["RENDER_CACHE_MAX_MB"] * 1024 * 1024
+        entries = []
+        for f in self.root.glob("*.mp4"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in sorted(entries):
+            if total <= limit:
+                break
+            f.unlink(missing_ok=True)
+            total -= size
+
+
+_render_cache = RenderCache()
+
+
+def _link_or_copy(src, dest):
+    dest = Path(dest)
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def _render_video(data_mgr, input_path, output_path, watermark_path=None,
+                  wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k",
+                  **kwargs):
+    has_wm = watermark_path and os.path.exists(watermark_path)
+    input_hash = data_mgr._calculate_hash(input_path)
+    key = None
+    if CONFIG["RENDER_CACHE_ENABLED"] and input_hash:
+        key = _render_cache.key(
+            input_hash,
+            data_mgr._calculate_hash(watermark_path) if has_wm else None,
+            wx, wy, opacity, enhance, bitrate,
+            kwargs.get("profile") or CONFIG["ENCODER_PROFILE"])
+        started = time.monotonic()
+        if _render_cache.get(key, output_path):
+            return {"mode": "cache",
+                    "wall_seconds": round(time.monotonic() - started, 3)}
+
+    metrics = _process_video_ffmpeg(input_path, output_path, watermark_path,
+                                    wx, wy, opacity, enhance, bitrate,
+                                    probe=data_mgr.probe(input_path), **kwargs)
+    # En modo streaming la salida vive en tmpfs: copiarla al cache en disco
+    # anularia el ahorro de I/O, igual que con los encodes por pipe
+    spooled = (CONFIG["STREAMING_MODE"]
+               and Path(output_path).parent == _streaming_tmp_dir())
+    if key and not spooled:
+        _render_cache.put(key, output_path)
+    return metrics
+
+
+class Pipeline:
+    _DONE = object()
+
+    def __init__(self, stages, queue_size=None, should_stop=None, on_exit=None):
+        self.stages = stages
+        self.queue_size = queue_size or CONFIG["PIPELINE_QUEUE_SIZE"]
+        self.should_stop = should_stop or (lambda: False)
+        self.on_exit = on_exit or (lambda: None)
+        self.errors = []
+
+    def run(self, items):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        queues.append(queue.Queue())
+        threads = []
+        for idx, (name, func, workers) in enumerate(self.stages):
+            downstream = (self.stages[idx + 1][2]
+                          if idx + 1 < len(self.stages) else 1)
+            remaining = [workers]
+            lock = threading.Lock()
+            for n in range(workers):
+                t = threading.Thread(
+                    target=self._worker, name=f"{name}-{n}", daemon=True,
+                    args=(func, queues[idx], queues[idx + 1],
+                          remaining, lock, downstream))
+                t.start()
+                threads.append(t)
+
+        for item in items:
+            if self.should_stop():
+                break
+            queues[0].put(item)
+        for _ in range(self.stages[0][2]):
+            queues[0].put(self._DONE)
+        for t in threads:
+            t.join()
+
+        results = []
+        while not queues[-1].empty():
+            item = queues[-1].get()
+            if item is not self._DONE:
+                results.append(item)
+        return results, self.errors
+
+    def _worker(self, func, inbox, outbox, remaining, lock, downstream):
+        try:
+            self._drain(func, inbox, outbox, remaining, lock, downstream)
+        finally:
+            self.on_exit()
+
+    def _drain(self, func, inbox, outbox, remaining, lock, downstream):
+        while True:
+            item = inbox.get()
+            if item is self._DONE:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    for _ in range(downstream):
+                        outbox.put(self._DONE)
+                return
+            if self.should_stop():
+                continue
+            try:
+                result = func(item)
+            except Exception as e:
+                self.errors.append((item, e))
+                continue
+            if result is not None:
+                outbox.put(result)
+
+
+def _process_tiktok_mode(ig_session, data_mgr, watermark_path=None,
+                         wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k",
+                         should_stop=None, on_progress=None):
+    # Primero se reanudan los items que quedaron a medias
+    batch = data_mgr.resumable_work_items("tiktok",
+                                          CONFIG["PIPELINE_BATCH_SIZE"])
+    if len(batch) < CONFIG["PIPELINE_BATCH_SIZE"]:
+        batch += _candidates.take(
+            CONFIG["PIPELINE_BATCH_SIZE"] - len(batch), data_mgr)
+    if not batch:
+        return 0
+
+    def _candidate_url(candidate):
+        if (time.time() - candidate["url_at"]
+                < CONFIG["CANDIDATE_URL_TTL_SECONDS"]):
+            return candidate["url"]
+        return None
+
+    def _accept(video, raw_path, download):
+        signature = data_mgr.perceptual_signature(raw_path)
+        if data_mgr.is_duplicate(file_hash=download["sha256"],
+                                 sample_hash=download["sample_hash"],
+                                 signature=signature):
+            if CONFIG["CLEANUP_AFTER_UPLOAD"] and os.path.exists(raw_path):
+                os.remove(raw_path)
+            return None
+        item = {"video_id": video.id, "caption": _build_caption(video.desc),
+                "raw_path": raw_path, "signature": signature,
+                "download": download}
+        data_mgr.save_work_item(item, "downloaded")
+        return item
+
+    def _download(candidate):
+        if "stage" in candidate:
+            return candidate
+        video = candidate["video"]
+        download = _download_tiktok_video(
+            video, CONFIG["DOWNLOAD_FOLDER"], data_mgr,
+            video_url=_candidate_url(candidate))
+        if download is None:
+            return None
+        return _accept(video, download["path"], download)
+
+    def _encode(item, output_dir=None):
+        if item.get("stage") == "encoded":
+            return item
+        priority = ENCODE_PRIORITIES["resumed" if "stage" in item else "tiktok"]
+        output_dir = output_dir or CONFIG["OUTPUT_FOLDER"]
+        _ensure_directory(output_dir)
+        item["output_path"] = (Path(output_dir)
+                               / f"processed_{Path(item['raw_path']).name}")
+        metrics = _render_video(
+            data_mgr, item["raw_path"], item["output_path"], watermark_path,
+            wx, wy, opacity, enhance, bitrate, priority=priority,
+            on_progress=on_progress)
+        data_mgr.register_encode_metrics(item["video_id"], metrics)
+        data_mgr.save_work_item(item, "encoded")
+        return item
+
+    def _stream(candidate):
+        if "stage" in candidate:
+            return _encode(candidate)
+        video = candidate["video"]
+        url = _candidate_url(candidate) or _tiktok_session.video_url(video)
+        tmp_dir = _streaming_tmp_dir()
+        name = f"{getattr(video, 'create_time', int(time.time()))}_{video.id}.mp4"
+        on_prefix = (data_mgr.is_known_prefix
+                     if CONFIG["DOWNLOAD_EARLY_ABORT"] else None)
+        try:
+            source = _open_streaming_source(url, tmp_dir / name, on_prefix)
+            if source["path"]:
+                item = _accept(video, source["path"], source["result"])
+                return item and _encode(item, tmp_dir)
+
+            output_path = tmp_dir / f"processed_{name}"
+            metrics = _process_video_ffmpeg(
+                "pipe:0", output_path, watermark_path,
+                wx, wy, opacity, enhance, bitrate,
+                priority=ENCODE_PRIORITIES["stream"],
+                on_progress=on_progress, stdin=source["stdin"])
+        except DownloadAborted:
+            return None
+        download = source["result"]
+        if data_mgr.is_duplicate(file_hash=download["sha256"],
+                                 sample_hash=download["sample_hash"]):
+            os.remove(output_path)
+            return None
+        data_mgr.register_encode_metrics(video.id, metrics)
+        item = {"video_id": video.id, "caption": _build_caption(video.desc),
+                "raw_path": None, "signature": None, "download": download,
+                "output_path": output_path}
+        data_mgr.save_work_item(item, "encoded")
+        return item
+
+    def _upload(item):
+        _upload_reel(ig_session, str(item["output_path"]), item["caption"],
+                     should_stop=should_stop)
+        download = item["download"]
+        data_mgr.register_success(item["video_id"], str(item["output_path"]),
+                                  "tiktok", item["caption"],
+                                  signature=item["signature"],
+                                  file_hash=download.get("sha256"),
+                                  sample_hash=download.get("sample_hash"),
+                                  prefix_hash=download.get("prefix_hash"))
+        data_mgr.complete_work_item(item["video_id"])
+        if CONFIG["CLEANUP_AFTER_UPLOAD"] or CONFIG["STREAMING_MODE"]:
+            for p in [item["raw_path"], item["output_path"]]:
+                if p and os.path.exists(str(p)):
+                    os.remove(str(p))
+        return item
+
+    if CONFIG["STREAMING_MODE"]:
+        stages = [("stream", _stream, CONFIG["PIPELINE_ENCODE_WORKERS"])]
+    else:
+        stages = [("download", _download, CONFIG["PIPELINE_DOWNLOAD_WORKERS"]),
+                  ("encode",   _encode,   CONFIG["PIPELINE_ENCODE_WORKERS"])]
+    stages.append(("upload", _upload, CONFIG["PIPELINE_UPLOAD_WORKERS"]))
+    pipeline = Pipeline(stages, should_stop=should_stop,
+                        on_exit=data_mgr.db.release)
+    done, errors = pipeline.run(batch)
+    for item, e in errors:
+        if "video_id" in item:
+            data_mgr.fail_work_item(item["video_id"], e)
+    if errors and not done:
+        raise errors[0][1]
+    for _, e in errors:
+        data_mgr.register_error(f"pipeline_{time.time_ns()}", "tiktok", str(e))
+    return len(done)
+
+
+def _process_local_mode(ig_session, data_mgr, watermark_path=None,
+                        wx=0, wy=0, opacity=0.7, enhance=True, bitrate="2500k",
+                        should_stop=None, on_progress=None):
+    input_path = CONFIG["LOCAL_VIDEO_PATH"]
+    signature = data_mgr.perceptual_signature(input_path)
+    if data_mgr.is_duplicate(filepath=input_path, signature=signature):
+        return False
+
+    caption = _build_caption()
+    vid = hashlib.md5(
+        f"{input_path}{os.path.getmtime(input_path)}".encode()).hexdigest()
+    _ensure_directory(CONFIG["OUTPUT_FOLDER"])
+    output_path = Path(CONFIG["OUTPUT_FOLDER"]) / f"processed_{Path(input_path).name}"
+    metrics = _render_video(data_mgr, input_path, output_path,
+                            watermark_path, wx, wy, opacity, enhance, bitrate,
+                            priority=ENCODE_PRIORITIES["local"],
+                            on_progress=on_progress)
+    data_mgr.register_encode_metrics(vid, metrics)
+    _upload_reel(ig_session, str(output_path), caption, should_stop=should_stop)
+
+    # Huellas del original (ya memorizadas por is_duplicate): son las que se
+    # comparan en la siguiente vuelta, no las de la salida renderizada
+    data_mgr.register_success(vid, str(output_path), "local", caption,
+                              signature=signature,
+                              file_hash=data_mgr._calculate_hash(input_path),
+                              sample_hash=data_mgr._sample_hash(input_path))
+
+    if CONFIG["CLEANUP_AFTER_UPLOAD"] and output_path.exists():
+        os.remove(output_path)
+    return True
+
+
+def _calc_watermark_position(code, logo_w, logo_h,
+                             target_w=TARGET_W, target_h=TARGET_H, pad=30):
+    x = pad if "L" in code else (target_w - logo_w - pad if "R" in code
+                                  else (target_w - logo_w) // 2)
+    y = pad if "T" in code else (target_h - logo_h - pad if "B" in code
+                                  else (target_h - logo_h) // 2)
+    return x, y
+
+
+class ResourceGovernor:
+    def __init__(self):
+        self._samples = deque(maxlen=CONFIG["GOVERNOR_WINDOW"])
+        self._cond = threading.Condition()
+        self._tickets = []
+        self._thread = None
+
+    def _start(self):
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._sampler,
+                                            name="resource-governor",
+                                            daemon=True)
+            self._thread.start()
+            self._cond.wait(2)
+
+    def _sample(self, psutil):
+        folder = CONFIG.get("OUTPUT_FOLDER", ".")
+        if not os.path.isdir(folder):
+            folder = "."
+        mem = psutil.virtual_memory()
+        return {"cpu": psutil.cpu_percent(interval=None),
+                "mem_percent": mem.percent,
+                "mem_total_mb": mem.total / 2**20,
+                "mem_available_mb": mem.available / 2**20,
+                "disk_free_mb": psutil.disk_usage(folder).free / 2**20}
+
+    def _sampler(self):
+        try:
+            import psutil
+        except ImportError:
+            with self._cond:
+                self._cond.notify_all()
+            return
+        psutil.cpu_percent(interval=0.1)
+        while True:
+            try:
+                sample = self._sample(psutil)
+            except Exception:
+                sample = None
+            with self._cond:
+                if sample:
+                    self._samples.append(sample)
+                self._cond.notify_all()
+            time.sleep(CONFIG["GOVERNOR_SAMPLE_SECONDS"])
+
+    def metrics(self):
+        self._start()
+        with self._cond:
+            if not self._samples:
+                return None
+            return {k: round(sum(s[k] for s in self._samples)
+                             / len(self._samples), 1)
+                    for k in self._samples[0]}
+
+    def _overloaded(self, m):
+        return (m["cpu"] > CONFIG["GOVERNOR_MAX_CPU_PERCENT"]
+                or m["mem_percent"] > CONFIG["GOVERNOR_MAX_MEM_PERCENT"]
+                or m["disk_free_mb"] < CONFIG["GOVERNOR_MIN_DISK_FREE_MB"])
+
+    def overloaded(self):
+        m = self.metrics()
+        return m is not None and self._overloaded(m)
+
+    def _fits(self, cpu, mem_mb, disk_mb):
+        m = self.metrics()
+        if m is None:
+            return True
+        limit = CONFIG["GOVERNOR_MAX_CPU_PERCENT"]
+        if not self._tickets:
+            # Un trabajo mayor que todo el margen nunca cabria: a solas se
+            # recorta para que entre con la maquina casi en reposo
+            cpu = min(cpu, limit - CONFIG["GOVERNOR_IDLE_CPU_PERCENT"])
+        # Lo reservado solo cuenta para CPU y RAM mientras el trabajo aun no
+        # aparece en la ventana de muestras; el disco se sigue llenando
+        # durante todo el trabajo
+        ramp = CONFIG["GOVERNOR_WINDOW"] * CONFIG["GOVERNOR_SAMPLE_SECONDS"]
+        now = time.monotonic()
+        young = [t for t in self._tickets if now - t["at"] < ramp]
+        cpu_load = m["cpu"] + cpu + sum(t["cpu"] for t in young)
+        mem_left = (m["mem_available_mb"] - mem_mb
+                    - sum(t["mem_mb"] for t in young))
+        mem_load = 100 - mem_left * 100 / m["mem_total_mb"]
+        disk_left = (m["disk_free_mb"] - disk_mb
+                     - sum(t["disk_mb"] for t in self._tickets))
+        # La descarga es I/O: no se le aplica el limite de CPU
+        return ((not cpu or cpu_load <= limit)
+                and mem_load <= CONFIG["GOVERNOR_MAX_MEM_PERCENT"]
+                and disk_left >= CONFIG["GOVERNOR_MIN_DISK_FREE_MB"])
+
+    def acquire(self, cpu=0.0, mem_mb=0.0, disk_mb=0.0, timeout=None,
+                should_stop=None):
+        self._start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._fits(cpu, mem_mb, disk_mb):
+                if should_stop and should_stop():
+                    return None
+                wait = 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return None
+                self._cond.wait(wait)
+            ticket = {"cpu": cpu, "mem_mb": mem_mb, "disk_mb": disk_mb,
+                      "at": time.monotonic()}
+            self._tickets.append(ticket)
+            return ticket
+
+    def release(self, ticket):
+        with self._cond:
+            self._tickets.remove(ticket)
+            self._cond.notify_all()
+
+    def wait_for_headroom(self, should_stop=None):
+        self._start()
+        with self._cond:
+            while self.overloaded():
+                if should_stop and should_stop():
+                    return False
+                self._cond.wait(1.0)
+        return True
+
+
+_governor = ResourceGovernor()
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, event, **data):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, data)
+            except Exception:
+                pass
+
+
+class BotEngine:
+    def __init__(self, data_mgr, bus=None):
+        self.data_mgr = data_mgr
+        self.bus = bus or EventBus()
+        self.iteration = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.fatal_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return (self._thread is not None and self._thread.is_alive()
+                and not self._stop.is_set())
+
+    def start(self):
+        # Un hilo anterior puede seguir vivo tras stop() (p.ej. en un upload);
+        # reutilizar el Event lo "des-pararia" y habria dos bucles a la vez
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="bot-engine",
+                                        daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        _encoder.cancel_all()
+        self.bus.publish("stopping")
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def _stats(self):
+        return dict(iteration=self.iteration, success=self.success_count,
+                    errors=self.error_count)
+
+    def _iterate(self, ig_session):
+        mode = CONFIG["MODE"]
+        wm = CONFIG["WATERMARK_PATH"] if CONFIG["WATERMARK_ENABLED"] else None
+        kw = dict(
+            watermark_path=wm,
+            wx=CONFIG["WATERMARK_X"],
+            wy=CONFIG["WATERMARK_Y"],
+            opacity=CONFIG["WATERMARK_OPACITY"],
+            enhance=CONFIG["ENHANCE_QUALITY"],
+            bitrate=CONFIG["VIDEO_BITRATE"],
+            should_stop=self._stop.is_set,
+            on_progress=lambda p: self.bus.publish("progress", **p))
+
+        if mode in ("tiktok", "both"):
+            self.success_count += _process_tiktok_mode(
+                ig_session, self.data_mgr, **kw)
+        if mode in ("local", "both"):
+            if _process_local_mode(ig_session, self.data_mgr, **kw):
+                self.success_count += 1
+
+    def run(self):
+        self.fatal_error = None
+        self.bus.publish("started")
+        try:
+            _ensure_ffmpeg()
+            _ensure_directory(CONFIG["DOWNLOAD_FOLDER"])
+            _ensure_directory(CONFIG["OUTPUT_FOLDER"])
+            ig_session = _instagram_login()
+
+            while not self._stop.is_set():
+                self.iteration += 1
+                self.bus.publish("iteration", **self._stats())
+
+                if _governor.overloaded():
+                    self.bus.publish("throttled", **_governor.metrics())
+                    if not _governor.wait_for_headroom(self._stop.is_set):
+                        continue
+
+                try:
+                    self._iterate(ig_session)
+                except Exception as e:
+                    self.error_count += 1
+                    self.data_mgr.register_error(
+                        f"iter_{self.iteration}", "bot", str(e))
+                    self.bus.publish("error", message=str(e), **self._stats())
+                    if not CONFIG["LOOP_ENABLED"]:
+                        break
+                    self._stop.wait(60)
+                    continue
+
+                self.bus.publish("done", **self._stats())
+                if not CONFIG["LOOP_ENABLED"]:
+                    break
+
+                base = CONFIG["LOOP_DELAY_SECONDS"]
+                jitter = int(base * CONFIG["RANDOM_JITTER_PERCENT"] / 100)
+                delay = random.randint(base - jitter, base + jitter)
+                self.bus.publish("waiting", seconds=delay)
+                self._stop.wait(delay)
+
+        except Exception as e:
+            self.error_count += 1
+            self.fatal_error = e
+            self.bus.publish("fatal", message=str(e))
+        finally:
+            self._stop.set()
+            self.data_mgr.db.commit()
+            self.data_mgr.db.release()
+            self.bus.publish("stopped", **self._stats())
+
+
+def _cli_calibrate(args):
+    _ensure_ffmpeg()
+    _ensure_directory(CONFIG["DATA_FOLDER"])
+    data = _calibrate_encoder(args.sample or CONFIG["LOCAL_VIDEO_PATH"],
+                              args.target_ssim, args.seconds)
+    for r in data["results"]:
+        mark = "*" if r["profile"] == data["profile"] else " "
+        print(f"{mark} {r['profile']:<10} {r['seconds']:>7.2f} s  "
+              f"SSIM {r['ssim']:.4f}")
+    print(f"Perfil seleccionado: {data['profile']}")
+    return 0
+
+
+def _cli_run(args):
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            CONFIG.update(json.load(f))
+    if args.mode:
+        CONFIG["MODE"] = args.mode
+    # Como demonio se repite por defecto; --once hace una sola iteracion
+    CONFIG["LOOP_ENABLED"] = not args.once
+    for folder in [CONFIG["DATA_FOLDER"], CONFIG["DOWNLOAD_FOLDER"],
+                   CONFIG["OUTPUT_FOLDER"]]:
+        Path(folder).mkdir(parents=True, exist_ok=True)
+    _load_encoder_calibration()
+
+    engine = BotEngine(DataManager(CONFIG["DATA_FOLDER"]))
+
+    def _log(event, data):
+        if event == "progress":
+            return
+        details = " ".join(f"{k}={v}" for k, v in data.items())
+        print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {event} {details}".rstrip(),
+              flush=True)
+
+    engine.bus.subscribe(_log)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: engine.stop())
+    engine.start()
+    while not engine.join(1):
+        pass
+    if engine.fatal_error is not None:
+        return 2
+    return 0 if engine.error_count == 0 or engine.success_count else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instagram Reels Bot Pro")
+    sub = parser.add_subparsers(dest="command")
+    cal = sub.add_parser("calibrate",
+                         help="Medir perfiles de codificación en esta máquina")
+    cal.add_argument("sample", nargs="?", help="Vídeo de muestra")
+    cal.add_argument("--target-ssim", type=float, default=None)
+    cal.add_argument("--seconds", type=int, default=None)
+    run = sub.add_parser("run", help="Ejecutar el bot sin interfaz gráfica")
+    run.add_argument("--config", help="JSON con valores que sobrescriben CONFIG")
+    run.add_argument("--mode", choices=["tiktok", "local", "both"])
+    loop = run.add_mutually_exclusive_group()
+    loop.add_argument("--loop", dest="once", action="store_false",
+                      help="Repetir hasta SIGINT/SIGTERM (por defecto)")
+    loop.add_argument("--once", dest="once", action="store_true",
+                      help="Una sola iteración y salir")
+    run.set_defaults(once=False)
+    args = parser.parse_args(argv)
+
+    if args.command == "calibrate":
+        sys.exit(_cli_calibrate(args))
+    if args.command == "run":
+        sys.exit(_cli_run(args))
+
+    try:
+        for folder in [CONFIG["DATA_FOLDER"], CONFIG["DOWNLOAD_FOLDER"],
+                       CONFIG["OUTPUT_FOLDER"]]:
+            Path(folder).mkdir(parents=True, exist_ok=True)
+        _load_encoder_calibration()
+        # La GUI importa "main"; se reutiliza este modulo si corre como script
+        sys.modules.setdefault("main", sys.modules[__name__])
+        from gui import BotGUI
+        app = BotGUI()
+        app.protocol("WM_DELETE_WINDOW", app._on_closing)
+        app.mainloop()
+    except Exception as e:
+        from tkinter import messagebox
+        messagebox.showerror("Error", f"Error al iniciar:\n{str(e)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
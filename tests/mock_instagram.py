@@ -0,0 +1,63 @@
+import json
+import time
+import uuid
+
+from main import _session_id
+
+
+class LoginRequired(Exception):
+    pass
+
+
+class BadPassword(Exception):
+    pass
+
+
+# Sustituto local de instagrapi.Client con lo que usa main.py
+class MockInstagramClient:
+    def __init__(self):
+        self.settings = {}
+        self.logins = 0
+        self.uploads = []
+        self.session_valid = False
+
+    def set_settings(self, settings):
+        self.settings = dict(settings)
+        self.session_valid = bool(_session_id(self.settings))
+        return True
+
+    def get_settings(self):
+        # Como instagrapi, no incluye el usuario
+        return {k: v for k, v in self.settings.items() if k != "username"}
+
+    def load_settings(self, path):
+        with open(path, encoding="utf-8") as f:
+            self.set_settings(json.load(f))
+        return self.settings
+
+    def dump_settings(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.get_settings(), f)
+        return True
+
+    def login(self, username, password, relogin=False, verification_code=""):
+        if not password:
+            raise BadPassword("empty password")
+        self.logins += 1
+        self.settings.update(
+            last_login=time.time(),
+            authorization_data={"ds_user_id": "1",
+                                "sessionid": uuid.uuid4().hex})
+        self.session_valid = True
+        return True
+
+    def expire_session(self):
+        self.session_valid = False
+
+    def clip_upload(self, path, caption, extra_data=None):
+        if not self.session_valid:
+            raise LoginRequired("login_required")
+        media = {"pk": len(self.uploads) + 1, "path": str(path),
+                 "caption": caption}
+        self.uploads.append(media)
+        return media
@@ -0,0 +1,80 @@
+import json
+import time
+
+import pytest
+
+import main
+from mock_instagram import MockInstagramClient
+
+
+@pytest.fixture
+def clients(tmp_path, monkeypatch):
+    monkeypatch.setitem(main.CONFIG, "DATA_FOLDER", str(tmp_path))
+    monkeypatch.setitem(main.CONFIG, "INSTAGRAM_USERNAME", "cuenta_a")
+    monkeypatch.setitem(main.CONFIG, "INSTAGRAM_PASSWORD", "secreto")
+    monkeypatch.setitem(main.CONFIG, "RETRY_BACKOFF_MULTIPLIER", 0.01)
+    created = []
+
+    def _new_client(self):
+        created.append(MockInstagramClient())
+        return created[-1]
+
+    monkeypatch.setattr(main.InstagramSession, "_new_client", _new_client)
+    return created
+
+
+def _write_session(path, username, sessionid="abc"):
+    path.write_text(json.dumps({
+        "username": username, "last_login": time.time(),
+        "authorization_data": {"ds_user_id": "1", "sessionid": sessionid}}))
+
+
+def test_fresh_session_skips_login(clients, tmp_path):
+    session = main.InstagramSession()
+    _write_session(session.session_path, "cuenta_a")
+    session.client()
+    assert clients[0].logins == 0
+
+
+def test_other_account_session_forces_login(clients, tmp_path):
+    session = main.InstagramSession()
+    _write_session(session.session_path, "cuenta_b", sessionid="de_b")
+    cl = session.client()
+    assert cl.logins == 1
+    assert main._session_id(cl.get_settings()) != "de_b"
+    stored = json.loads(session.session_path.read_text())
+    assert stored["username"] == "cuenta_a"
+
+
+def test_login_required_refreshes_once(clients, tmp_path):
+    session = main.InstagramSession()
+    video = tmp_path / "v.mp4"
+    video.write_bytes(b"x")
+    session.client().expire_session()
+
+    main._upload_reel(session, str(video), "caption")
+
+    assert len(clients) == 2
+    assert sum(c.logins for c in clients) == 2
+    assert [len(c.uploads) for c in clients] == [0, 1]
+
+
+def test_client_survives_engine_restarts(clients, tmp_path, monkeypatch):
+    monkeypatch.setitem(main.CONFIG, "LOOP_ENABLED", False)
+    monkeypatch.setitem(main.CONFIG, "MODE", "local")
+    monkeypatch.setitem(main.CONFIG, "DOWNLOAD_FOLDER", str(tmp_path / "dl"))
+    monkeypatch.setitem(main.CONFIG, "OUTPUT_FOLDER", str(tmp_path / "out"))
+    monkeypatch.setattr(main, "_ig_session", main.InstagramSession())
+    monkeypatch.setattr(main, "_ensure_ffmpeg", lambda: None)
+    monkeypatch.setattr(main._governor, "overloaded", lambda: False)
+    seen = []
+    monkeypatch.setattr(main, "_process_local_mode",
+                        lambda ig, dm, **kw: seen.append(ig.client()))
+
+    engine = main.BotEngine(main.DataManager(str(tmp_path)))
+    for _ in range(2):
+        assert engine.start()
+        assert engine.join(5)
+
+    assert len(seen) == 2 and seen[0] is seen[1]
+    assert len(clients) == 1 and clients[0].logins == 1
@@ -0,0 +1,28 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def local(tmp_path, monkeypatch):
+    source = tmp_path / "video.mp4"
+    source.write_bytes(b"original" * 1000)
+    monkeypatch.setitem(main.CONFIG, "LOCAL_VIDEO_PATH", str(source))
+    monkeypatch.setitem(main.CONFIG, "OUTPUT_FOLDER", str(tmp_path / "out"))
+    monkeypatch.setitem(main.CONFIG, "PERCEPTUAL_DEDUP", False)
+    monkeypatch.setitem(main.CONFIG, "CLEANUP_AFTER_UPLOAD", False)
+
+    def _render(data_mgr, input_path, output_path, *args, **kwargs):
+        output_path.write_bytes(b"rendered")
+        return {"mode": "full"}
+
+    monkeypatch.setattr(main, "_render_video", _render)
+    monkeypatch.setattr(main, "_upload_reel", lambda *a, **kw: {})
+    return source
+
+
+def test_local_video_registers_source_hashes(local, tmp_path):
+    data_mgr = main.DataManager(str(tmp_path))
+    assert main._process_local_mode(None, data_mgr)
+    assert bytes.fromhex(main._full_digest(local)) in data_mgr.processed_hashes
+    assert not main._process_local_mode(None, data_mgr)
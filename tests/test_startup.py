@@ -0,0 +1,19 @@
+import pytest
+
+import bench
+
+
+def test_import_skips_heavy_modules():
+    times = bench._import_times("main")
+    assert [m for m in bench.HEAVY_MODULES if m in times] == []
+
+
+def test_import_within_budget():
+    best_us = min(bench._import_times("main")["main"] for _ in range(3))
+    assert best_us / 1000 <= bench.STARTUP_BUDGET_MS
+
+
+def test_gui_import_skips_heavy_modules():
+    pytest.importorskip("customtkinter")
+    times = bench._import_times("gui")
+    assert [m for m in bench.GUI_HEAVY_MODULES if m in times] == []
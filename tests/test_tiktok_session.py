@@ -0,0 +1,47 @@
+import asyncio
+import sys
+import time
+import types
+
+import pytest
+
+import main
+
+
+class HangingTikTokApi:
+    instances = []
+
+    def __init__(self):
+        self.closed = False
+        HangingTikTokApi.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.closed = True
+
+    async def create_sessions(self, **kwargs):
+        await asyncio.sleep(60)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    HangingTikTokApi.instances.clear()
+    monkeypatch.setitem(sys.modules, "TikTokApi",
+                        types.SimpleNamespace(TikTokApi=HangingTikTokApi))
+    monkeypatch.setitem(main.CONFIG, "TIKTOK_CALL_TIMEOUT", 0.2)
+    session = main.TikTokSession()
+    yield session
+    session.close()
+
+
+def test_timeout_cancels_hung_session_creation(session):
+    with pytest.raises(TimeoutError):
+        session.trending(1)
+
+    deadline = time.monotonic() + 2
+    while not HangingTikTokApi.instances[0].closed:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert session._api is None